@@ -3,13 +3,17 @@ from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
-db = SQLAlchemy()
+from app.utils.replica import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object('app.config.Config')
     app.config["SECRET_KEY"] = "sjhardwaresecretkey"
+    if config:
+        app.config.update(config)  # e.g. tests pointing at their own database
 
     db.init_app(app)
     migrate.init_app(app, db)
@@ -48,6 +52,8 @@ def create_app():
     from app.routes.customer import customer_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.reports import reports_bp
+    from app.routes.periods import periods_bp
+    from app.routes.system import system_bp
 
     # Register blueprints
     app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
@@ -61,5 +67,11 @@ def create_app():
     app.register_blueprint(customer_bp, url_prefix='/api/customer')
     app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
+    app.register_blueprint(periods_bp, url_prefix='/api/periods')
+    app.register_blueprint(system_bp, url_prefix='/api/system')
+
+    # Management commands (flask balances ...)
+    from app.commands import register_commands
+    register_commands(app)
 
     return app
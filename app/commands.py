@@ -0,0 +1,169 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+
+
+balances_cli = AppGroup('balances', help="Maintain the account_balance table.")
+
+
+@balances_cli.command('rebuild')
+def rebuild_balances():
+    """Recompute account_balance from the general ledger."""
+    from app.utils.balances import rebuild_account_balances
+
+    count = rebuild_account_balances()
+    db.session.commit()
+    click.echo(f"✅ Rebuilt balances for {count} accounts.")
+
+
+@balances_cli.command('check')
+def check_balances():
+    """Compare account_balance with the general ledger."""
+    from app.utils.balances import check_account_balances
+
+    mismatches = check_account_balances()
+    if not mismatches:
+        click.echo("✅ account_balance matches the general ledger.")
+        return
+
+    for m in mismatches:
+        click.echo(
+            f"❌ Account {m['account_id']}: ledger Dr {m['ledger_debit']:.2f} / Cr {m['ledger_credit']:.2f}, "
+            f"stored Dr {m['stored_debit']:.2f} / Cr {m['stored_credit']:.2f}"
+        )
+    raise SystemExit(1)
+
+
+periods_cli = AppGroup('periods', help="Close and reopen accounting periods.")
+
+
+@periods_cli.command('close')
+@click.argument('year', type=int)
+@click.argument('month', type=int)
+@click.option('--closing-entries', is_flag=True, help="Post closing entries to Retained Earnings (3100).")
+def close_period_command(year, month, closing_entries):
+    """Close YEAR-MONTH and write its balance snapshots."""
+    from app.utils.periods import close_period
+
+    try:
+        period = close_period(year, month, post_closing_entries=closing_entries)
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    db.session.commit()
+    click.echo(f"✅ Closed {period.period_start:%Y-%m}.")
+
+
+@periods_cli.command('reopen')
+def reopen_period_command():
+    """Reopen the most recently closed period."""
+    from app.utils.periods import reopen_latest_period
+
+    try:
+        period = reopen_latest_period()
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    db.session.commit()
+    click.echo(f"✅ Reopened {period.period_start:%Y-%m}.")
+
+
+product_costs_cli = AppGroup('product-costs', help="Maintain the product_cost table.")
+
+
+@product_costs_cli.command('rebuild')
+def rebuild_product_costs_command():
+    """Recompute last/average cost and inventory value from purchase history."""
+    from app.utils.stock import rebuild_product_costs
+
+    count = rebuild_product_costs()
+    db.session.commit()
+    click.echo(f"✅ Rebuilt costs for {count} products.")
+
+
+rollups_cli = AppGroup('rollups', help="Maintain the daily sales and expense summaries.")
+
+
+@rollups_cli.command('rebuild')
+def rebuild_rollups_command():
+    """Recompute daily_sales_summary and daily_expense_summary from the documents."""
+    from app.utils.rollups import rebuild_daily_summaries
+
+    sales_days, expense_days = rebuild_daily_summaries()
+    db.session.commit()
+    click.echo(f"✅ Rebuilt {sales_days} sales days and {expense_days} expense days.")
+
+
+@click.command('check-query-plans')
+def check_query_plans_command():
+    """EXPLAIN the hot report/list queries; fail on Seq Scans of large tables or Sorts in ordered lists."""
+    from app.utils.query_plans import check_query_plans
+
+    failures = 0
+    for name, problems in check_query_plans().items():
+        if problems:
+            failures += 1
+            click.echo(f"❌ {name}: {'; '.join(problems)}")
+        else:
+            click.echo(f"✅ {name}")
+    if failures:
+        raise SystemExit(1)
+
+
+@click.command('create-admin')
+@click.argument('username')
+@click.password_option(help="Password for the account (prompted when omitted).")
+def create_admin_command(username, password):
+    """Create USERNAME as an Admin, or promote an existing user and reset their password."""
+    from datetime import datetime
+
+    from app.models import User
+    from app.utils.permissions import permission_cache
+
+    now = datetime.utcnow()
+    user = User.query.filter_by(username=username).first()
+    created = user is None
+    if created:
+        user = User(username=username, status=1, created_at=now)
+        db.session.add(user)
+    else:
+        user.bump_permissions_version()
+    user.role = 'Admin'
+    user.status = 1
+    user.set_password(password)
+    user.updated_at = now
+    db.session.commit()
+    permission_cache.invalidate_user(user.id)
+    click.echo(f"✅ {'Created' if created else 'Promoted'} admin '{username}'.")
+
+
+@click.command('serve')
+@click.option('--bind', help="Address to listen on (default SERVER_BIND).")
+@click.option('--workers', type=int, help="Worker processes (default SERVER_WORKERS).")
+@click.option('--threads', type=int, help="Threads per worker (default SERVER_THREADS).")
+def serve_command(bind, workers, threads):
+    """Bootstrap once, then serve the app with gunicorn workers."""
+    from app.utils.serving import bootstrap, serve
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        raise click.ClickException("gunicorn is not installed (pip install -r requirements.txt).")
+
+    app = current_app._get_current_object()
+    added = bootstrap(app)
+    if added:
+        click.echo(f"✅ Added {len(added)} new accounts: {', '.join(added)}")
+    serve(app, bind=bind, workers=workers, threads=threads)
+
+
+def register_commands(app):
+    app.cli.add_command(balances_cli)
+    app.cli.add_command(periods_cli)
+    app.cli.add_command(product_costs_cli)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(serve_command)
+    app.cli.add_command(create_admin_command)
@@ -10,6 +10,17 @@ class StatusMixin:
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # ------------------ Transaction Numbers ------------------
+# Document numbers (the transaction_no columns) are drawn from this sequence in
+# blocks of `increment` per worker process; see gl_utils.TransactionNumberAllocator.
+transaction_document_seq = db.Sequence('transaction_document_seq', start=1, increment=20, metadata=db.metadata)
+
+# Version stamps of the computed-report caches (app.utils.cache.SnapshotCache):
+# invalidating a cache advances its sequence, which every worker process sees.
+dashboard_cache_version_seq = db.Sequence('dashboard_cache_version_seq', metadata=db.metadata)
+debtors_cache_version_seq = db.Sequence('debtors_cache_version_seq', metadata=db.metadata)
+
+# Legacy: one row per document, written before the sequence allocator existed.
+# Kept so older transaction_no values still resolve.
 class TransactionNumber(db.Model, StatusMixin):
     id = db.Column(db.Integer, primary_key=True)
     prefix = db.Column(db.String(10), nullable=False)  # e.g., INV, PO, PAY, EXP
@@ -51,6 +62,10 @@ class Supplier(db.Model, StatusMixin):
 
 class PurchaseOrder(db.Model, StatusMixin):
     __tablename__ = 'purchase_order'
+    __table_args__ = (
+        # List order for the paged purchase order list (any status filter)
+        db.Index('ix_purchase_order_date', 'purchase_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=False)
@@ -58,7 +73,7 @@ class PurchaseOrder(db.Model, StatusMixin):
     purchase_date = db.Column(db.DateTime, default=datetime.utcnow)
     memo = db.Column(db.String(255))
     received_at = db.Column(db.DateTime)
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'))
+    transaction_no = db.Column(db.Integer)
 
     # Financial fields
     total_amount = db.Column(db.Float, default=0)    # sum of all items
@@ -79,6 +94,9 @@ class PurchaseOrder(db.Model, StatusMixin):
 
 class PurchaseOrderItem(db.Model, StatusMixin):
     __tablename__ = 'purchase_order_item'
+    __table_args__ = (
+        db.Index('ix_purchase_order_item_product_created', 'product_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     purchase_order_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=False)
@@ -121,7 +139,7 @@ class SupplierPayment(db.Model, StatusMixin):
     payment_date = db.Column(db.DateTime, default=datetime.utcnow)
     reference = db.Column(db.String(100))
     # transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'))
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'), nullable=True)
+    transaction_no = db.Column(db.Integer, nullable=True)
     status = db.Column(db.Integer, default=1)
 
 
@@ -130,6 +148,11 @@ class SupplierPayment(db.Model, StatusMixin):
 # ------------------ Sales ------------------
 class Sale(db.Model, StatusMixin):
     __tablename__ = 'sale'
+    __table_args__ = (
+        db.Index('ix_sale_status_date', 'status', 'sale_date', 'id'),
+        # List order for the paged sales list, whose default filter is a status IN list
+        db.Index('ix_sale_date', 'sale_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sale_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -147,7 +170,7 @@ class Sale(db.Model, StatusMixin):
     sale_date = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Optional: Transaction Tracking
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'), nullable=True)
+    transaction_no = db.Column(db.Integer, nullable=True)
 
     # Relationships
     customer = db.relationship('Customer', backref='sales', lazy=True)
@@ -170,6 +193,9 @@ class Sale(db.Model, StatusMixin):
 
 class SaleItem(db.Model, StatusMixin):
     __tablename__ = 'sale_item'
+    __table_args__ = (
+        db.Index('ix_sale_item_sale_status', 'sale_id', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'), nullable=False)
@@ -181,7 +207,7 @@ class SaleItem(db.Model, StatusMixin):
     total_price = db.Column(db.Float, default=0)
 
     # Optional: Track which transaction added this item
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'), nullable=True)
+    transaction_no = db.Column(db.Integer, nullable=True)
 
     # Relationship
     product = db.relationship('Product', backref='sale_items', lazy=True)
@@ -204,13 +230,17 @@ class SaleItem(db.Model, StatusMixin):
 
 # ------------------ Payments ------------------
 class Payment(db.Model, StatusMixin):
+    __table_args__ = (
+        db.Index('ix_payment_sale_status', 'sale_id', 'status'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'))
     amount = db.Column(db.Float, nullable=False)
     payment_type = db.Column(db.String(20))
     payment_date = db.Column(db.DateTime, default=datetime.utcnow)
     reference = db.Column(db.String(100))
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'))
+    transaction_no = db.Column(db.Integer)
      
     # Link to payment account
     payment_account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
@@ -220,7 +250,7 @@ class InventoryTransaction(db.Model, StatusMixin):
     __tablename__ = 'inventory_transaction'
 
     id = db.Column(db.Integer, primary_key=True)
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'), nullable=False)  # link to GL
+    transaction_no = db.Column(db.Integer, nullable=False)  # link to GL
 
     # Source documents
     purchase_order_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=True)
@@ -237,7 +267,6 @@ class InventoryTransaction(db.Model, StatusMixin):
     product = db.relationship('Product', backref='inventory_transactions', lazy=True)
     purchase_order = db.relationship('PurchaseOrder', backref='inventory_transactions', lazy=True)
     sale = db.relationship('Sale', backref='inventory_transactions', lazy=True)
-    transaction_number = db.relationship('TransactionNumber', backref='inventory_transactions', lazy=True)
 
     def __repr__(self):
         return f"<InventoryTransaction {self.transaction_type} - ProductID={self.product_id} Qty={self.quantity}>"
@@ -265,6 +294,8 @@ class User(db.Model, StatusMixin):
     password_hash = db.Column(db.String(512), nullable=False)  # Increased size
 
     role = db.Column(db.String(20), default='Staff')
+    # Bumped whenever role or permissions change; carried in the JWT as "pv"
+    permissions_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     # Permissions relationship
     permissions = db.relationship('Permission', secondary=user_permissions,
@@ -280,18 +311,26 @@ class User(db.Model, StatusMixin):
         return check_password_hash(self.password_hash, password)
 
     def has_permission(self, perm_name):
-        """Check if user has a specific permission."""
-        return any(p.name == perm_name for p in self.permissions)
+        """Check if user has a specific permission (served from the in-process permission cache)."""
+        from app.utils.permissions import permission_cache
+
+        return permission_cache.allows(self.id, perm_name)
 
     def add_permission(self, perm):
         """Assign a permission to the user."""
         if perm not in self.permissions:
             self.permissions.append(perm)
+            self.bump_permissions_version()
 
     def remove_permission(self, perm):
         """Remove a permission from the user."""
         if perm in self.permissions:
             self.permissions.remove(perm)
+            self.bump_permissions_version()
+
+    def bump_permissions_version(self):
+        """Mark cached permissions stale; call permission_cache.invalidate_user after commit."""
+        self.permissions_version = (self.permissions_version or 1) + 1
 
     def is_admin(self):
         """Optional: Check if user is admin based on role."""
@@ -308,13 +347,16 @@ class StockAdjustment(db.Model, StatusMixin):
     quantity = db.Column(db.Integer, nullable=False)
     reason = db.Column(db.String(200))
     adjusted_at = db.Column(db.DateTime, default=datetime.utcnow)
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'))
+    transaction_no = db.Column(db.Integer)
 
 # ------------------ Expenses ------------------
 
 # -------------------- Expense Header --------------------
 class Expense(db.Model, StatusMixin):
     __tablename__ = 'expense'
+    __table_args__ = (
+        db.Index('ix_expense_status_date', 'status', 'expense_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)  # Overall memo/description
@@ -330,7 +372,7 @@ class Expense(db.Model, StatusMixin):
     reference = db.Column(db.String(100))
 
     # Link to a transaction number
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'))
+    transaction_no = db.Column(db.Integer)
 
     # Relationship to items
     items = db.relationship('ExpenseItem', backref='expense', lazy=True, cascade="all, delete-orphan")
@@ -374,10 +416,90 @@ class Account(db.Model, StatusMixin):
 
 # ------------------ General Ledger ------------------
 class GeneralLedger(db.Model, StatusMixin):
+    __table_args__ = (
+        # Statements, as-of balances and period totals; voided rows (status 9) are never read
+        db.Index('ix_general_ledger_account_date', 'account_id', 'transaction_date', 'id',
+                 postgresql_where=db.text('status != 9')),
+        db.Index('ix_general_ledger_transaction_no', 'transaction_no'),
+        # Date-ordered ledger lists, paged and streamed. Not partial: /api/ledgers
+        # lists voided rows too unless ?status= narrows it.
+        db.Index('ix_general_ledger_date', 'transaction_date', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
     transaction_type = db.Column(db.String(10), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     description = db.Column(db.String(200))
     transaction_date = db.Column(db.DateTime, default=datetime.utcnow)
-    transaction_no = db.Column(db.Integer, db.ForeignKey('transaction_number.id'))
+    transaction_no = db.Column(db.Integer)
+
+# ------------------ Account Balances ------------------
+class AccountBalance(db.Model):
+    """Running debit/credit totals per account, kept in step with general_ledger."""
+    __tablename__ = 'account_balance'
+
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), primary_key=True)
+    debit_total = db.Column(db.Float, default=0, nullable=False)
+    credit_total = db.Column(db.Float, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    account = db.relationship('Account', backref=db.backref('balance', uselist=False), lazy=True)
+
+# ------------------ Accounting Periods ------------------
+class FiscalPeriod(db.Model, StatusMixin):
+    """A closed calendar month. Postings dated on or before period_end are locked."""
+    __tablename__ = 'fiscal_period'
+
+    id = db.Column(db.Integer, primary_key=True)
+    period_start = db.Column(db.Date, unique=True, nullable=False)
+    period_end = db.Column(db.Date, nullable=False)
+    closed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    closing_transaction_no = db.Column(db.Integer, nullable=True)  # Retained earnings closing entries, if posted
+
+
+class AccountBalanceSnapshot(db.Model):
+    """Cumulative debit/credit totals per account through the end of a closed period."""
+    __tablename__ = 'account_balance_snapshot'
+
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), primary_key=True)
+    period_end = db.Column(db.Date, primary_key=True)
+    debit_total = db.Column(db.Float, default=0, nullable=False)
+    credit_total = db.Column(db.Float, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# ------------------ Product Costs ------------------
+class ProductCost(db.Model):
+    """Last and weighted-average purchase cost per product, kept up to date by purchase orders."""
+    __tablename__ = 'product_cost'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    last_cost = db.Column(db.Float, default=0, nullable=False)
+    average_cost = db.Column(db.Float, default=0, nullable=False)
+    inventory_value = db.Column(db.Float, default=0, nullable=False)  # on-hand quantity at average cost
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    product = db.relationship('Product', backref=db.backref('cost', uselist=False), lazy=True)
+
+# ------------------ Daily Rollups ------------------
+class DailySalesSummary(db.Model):
+    """Per-day totals of active sales, maintained by the sale and payment write paths."""
+    __tablename__ = 'daily_sales_summary'
+
+    day = db.Column(db.Date, primary_key=True)
+    sales_count = db.Column(db.Integer, default=0, nullable=False)
+    total_amount = db.Column(db.Float, default=0, nullable=False)
+    total_paid = db.Column(db.Float, default=0, nullable=False)
+    items_sold = db.Column(db.Integer, default=0, nullable=False)
+    cogs = db.Column(db.Float, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DailyExpenseSummary(db.Model):
+    """Per-day totals of active expenses, maintained by the expense write paths."""
+    __tablename__ = 'daily_expense_summary'
+
+    day = db.Column(db.Date, primary_key=True)
+    expense_count = db.Column(db.Integer, default=0, nullable=False)
+    total_amount = db.Column(db.Float, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
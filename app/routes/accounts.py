@@ -4,6 +4,8 @@ from app.models import Account
 from datetime import datetime
 
 from app.utils.auth import token_required
+from app.utils.account_cache import chart_of_accounts
+from app.utils.chart_of_accounts import PREDEFINED_ACCOUNTS, seed_chart_of_accounts
 
 accounts_bp = Blueprint('accounts', __name__, url_prefix='/accounts')
 
@@ -25,6 +27,7 @@ def add_account():
     )
     db.session.add(account)
     db.session.commit()
+    chart_of_accounts.invalidate()
     return jsonify({"message": "Account added", "account_id": account.id}), 201
 
 
@@ -82,6 +85,7 @@ def update_account(id):
     a.updated_at = datetime.utcnow()
     a.status = 1
     db.session.commit()
+    chart_of_accounts.invalidate()
     return jsonify({"message": "Account updated", "account_id": a.id})
 
 
@@ -95,6 +99,7 @@ def delete_account(id):
     a.status = 0
     a.updated_at = datetime.utcnow()
     db.session.commit()
+    chart_of_accounts.invalidate()
     return jsonify({"message": "Account marked inactive", "account_id": id})
 
 
@@ -105,56 +110,15 @@ def delete_account(id):
 
 def seed_accounts():
     """
-    Inserts a predefined chart of accounts into the database.
-    Avoids duplicates by checking account code.
+    Inserts the predefined chart of accounts into the database.
+    Existing codes are left untouched (one INSERT ... ON CONFLICT DO NOTHING).
     """
-    predefined_accounts = [
-        # Assets
-        {"code": "1000", "name": "Cash", "account_type": "Asset", "description": "Cash on hand"},
-        {"code": "1100", "name": "Accounts Receivable", "account_type": "Asset", "description": "Money owed by customers"},
-        {"code": "1200", "name": "Inventory", "account_type": "Asset", "description": "Products available for sale"},
-        {"code": "1300", "name": "Prepaid Expenses", "account_type": "Asset", "description": "Expenses paid in advance"},
-
-        # Liabilities
-        {"code": "2000", "name": "Accounts Payable", "account_type": "Liability", "description": "Money owed to suppliers"},
-        {"code": "2100", "name": "Accrued Liabilities", "account_type": "Liability", "description": "Expenses incurred but not paid"},
-
-        # Equity
-        {"code": "3000", "name": "Owner's Equity", "account_type": "Equity", "description": "Owner's capital account"},
-        {"code": "3100", "name": "Retained Earnings", "account_type": "Equity", "description": "Accumulated profits"},
-
-        # Revenue
-        {"code": "4000", "name": "Sales Revenue", "account_type": "Revenue", "description": "Revenue from sales"},
-        {"code": "4100", "name": "Service Revenue", "account_type": "Revenue", "description": "Revenue from services"},
-
-        # Expenses
-        {"code": "5000", "name": "Cost of Goods Sold", "account_type": "Expense", "description": "Direct costs of goods sold"},
-        {"code": "5100", "name": "Rent Expense", "account_type": "Expense", "description": "Rent costs"},
-        {"code": "5200", "name": "Salaries Expense", "account_type": "Expense", "description": "Salaries and wages"},
-        {"code": "5300", "name": "Utilities Expense", "account_type": "Expense", "description": "Electricity, water, etc."}
-    ]
-
-    added_accounts = []
-    skipped_accounts = []
-
-    for acc in predefined_accounts:
-        existing = Account.query.filter_by(code=acc["code"]).first()
-        if not existing:
-            new_account = Account(
-                name=acc["name"],
-                code=acc["code"],
-                account_type=acc["account_type"],
-                description=acc.get("description"),
-                status=1,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            db.session.add(new_account)
-            added_accounts.append(acc["name"])
-        else:
-            skipped_accounts.append(acc["name"])
-
+    added_accounts = seed_chart_of_accounts()
     db.session.commit()
+    chart_of_accounts.invalidate()
+
+    added = set(added_accounts)
+    skipped_accounts = [acc["name"] for acc in PREDEFINED_ACCOUNTS if acc["name"] not in added]
 
     return jsonify({
         "message": "Chart of Accounts seeded",
@@ -4,6 +4,9 @@ from app.models import Customer
 from datetime import datetime
 
 from app.utils.auth import token_required
+from app.utils.replica import read_replica
+from app.utils.filters import filter_status
+from app.utils.pagination import paginate, page_body
 
 customer_bp = Blueprint('customer', __name__, url_prefix='/customer')
 
@@ -31,9 +34,14 @@ def add_customer():
 # --- List all customers ---
 @customer_bp.route('/', methods=['GET'])
 @token_required
-
+@read_replica
 def list_customers():
-    customers = Customer.query.all()
+    try:
+        query = filter_status(Customer.query, Customer.status)
+        customers, next_cursor = paginate(query, Customer.id, descending=False)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     result = [
         {
             "id": c.id,
@@ -47,7 +55,7 @@ def list_customers():
         }
         for c in customers
     ]
-    return jsonify(result)
+    return jsonify(page_body(result, next_cursor))
 
 # --- Get customer by ID ---
 @token_required
@@ -1,111 +1,109 @@
 from flask import Blueprint, jsonify
 from app import db
-from app.models import Product, Sale, SaleItem, Expense
-from sqlalchemy import func
+from app.models import DailyExpenseSummary, DailySalesSummary, Product, Sale, SaleItem
+from sqlalchemy import func, literal, select, union_all
 from datetime import datetime, timedelta
 
 from app.utils.auth import token_required
+from app.utils.replica import use_read_replica
+from app.utils.cache import dashboard_cache
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
+dashboard_bp.before_request(use_read_replica)  # read-only: served from the replica when healthy
 
-@token_required
-@dashboard_bp.route('/metrics', methods=['GET'])
-def get_dashboard_metrics():
-    # ------------------ Total Products ------------------
-    total_products = db.session.query(func.count(Product.id)) \
-        .filter(Product.status != 9).scalar()
 
-    # ------------------ Total Sales ------------------
-    total_sales = db.session.query(func.coalesce(func.sum(Sale.total_amount), 0)) \
-        .filter(Sale.status != 9).scalar()
+def _compute_metrics():
+    # ------------------ Totals (one statement, from the daily rollups) ------------------
+    totals = db.session.query(
+        select(func.count(Product.id)).where(Product.status != 9).scalar_subquery().label('total_products'),
+        select(func.coalesce(func.sum(DailySalesSummary.total_amount), 0)).scalar_subquery().label('total_sales'),
+        select(func.coalesce(func.sum(DailyExpenseSummary.total_amount), 0)).scalar_subquery().label('total_expenses'),
+    ).one()
 
-    # ------------------ Total Expenses ------------------
-    total_expenses = db.session.query(func.coalesce(func.sum(Expense.total_amount), 0)) \
-        .filter(Expense.status != 9).scalar()
-
-    # ------------------ Last 7 Days ------------------
+    # ------------------ Last 7 Days (sales and expenses, one statement) ------------------
     today = datetime.utcnow().date()
     seven_days_ago = today - timedelta(days=6)
     days_list = [(seven_days_ago + timedelta(days=i)) for i in range(7)]
 
-    # Sales Last 7 Days
-    sales_data = dict(
-        db.session.query(
-            func.date(Sale.sale_date).label('day'),
-            func.coalesce(func.sum(Sale.total_amount), 0)
-        )
-        .filter(Sale.status != 9, func.date(Sale.sale_date) >= seven_days_ago)
-        .group_by(func.date(Sale.sale_date))
-        .all()
+    daily = union_all(
+        select(literal('sales').label('kind'), DailySalesSummary.day, DailySalesSummary.total_amount.label('amount'))
+        .where(DailySalesSummary.day >= seven_days_ago),
+        select(literal('expenses').label('kind'), DailyExpenseSummary.day, DailyExpenseSummary.total_amount.label('amount'))
+        .where(DailyExpenseSummary.day >= seven_days_ago),
     )
+    by_kind = {'sales': {}, 'expenses': {}}
+    for row in db.session.execute(daily):
+        by_kind[row.kind][row.day] = row.amount
+
     sales_last_7_days = [
-        {'day': day.strftime('%a'), 'amount': float(sales_data.get(day, 0))}
+        {'day': day.strftime('%a'), 'amount': float(by_kind['sales'].get(day, 0))}
         for day in days_list
     ]
-
-    # Expenses Last 7 Days
-    expenses_data = dict(
-        db.session.query(
-            func.date(Expense.expense_date).label('day'),
-            func.coalesce(func.sum(Expense.total_amount), 0)
-        )
-        .filter(Expense.status != 9, func.date(Expense.expense_date) >= seven_days_ago)
-        .group_by(func.date(Expense.expense_date))
-        .all()
-    )
     expenses_last_7_days = [
-        {'day': day.strftime('%a'), 'amount': float(expenses_data.get(day, 0))}
+        {'day': day.strftime('%a'), 'amount': float(by_kind['expenses'].get(day, 0))}
         for day in days_list
     ]
 
-    # ------------------ Best Performing Products (by revenue) ------------------
-    best_products = (
-        db.session.query(
+    # ------------------ Best / Least Performing Products (by revenue, one statement) ------------------
+    revenue = (
+        select(
             SaleItem.product_id,
             func.coalesce(func.sum(SaleItem.total_price), 0).label('total_revenue')
         )
         .join(Sale)
-        .filter(Sale.status != 9, SaleItem.status != 9)
+        .where(Sale.status != 9, SaleItem.status != 9)
         .group_by(SaleItem.product_id)
-        .order_by(func.sum(SaleItem.total_price).desc())
-        .limit(5)
-        .all()
+        .subquery()
     )
-    best_products_list = [
-        {
-            'product_id': p.product_id,
-            'product_name': db.session.query(Product.name).filter(Product.id == p.product_id).scalar(),
-            'total_revenue': float(p.total_revenue)
-        } for p in best_products
-    ]
-
-    # ------------------ Least Performing Products (by revenue) ------------------
-    least_products = (
-        db.session.query(
-            SaleItem.product_id,
-            func.coalesce(func.sum(SaleItem.total_price), 0).label('total_revenue')
+    ranked = (
+        select(
+            revenue.c.product_id,
+            Product.name.label('product_name'),
+            revenue.c.total_revenue,
+            func.row_number().over(order_by=(revenue.c.total_revenue.desc(), revenue.c.product_id)).label('best_rank'),
+            func.row_number().over(order_by=(revenue.c.total_revenue.asc(), revenue.c.product_id)).label('least_rank'),
         )
-        .join(Sale)
-        .filter(Sale.status != 9, SaleItem.status != 9)
-        .group_by(SaleItem.product_id)
-        .order_by(func.sum(SaleItem.total_price).asc())
-        .limit(5)
-        .all()
+        .outerjoin(Product, Product.id == revenue.c.product_id)
+        .subquery()
     )
-    least_products_list = [
-        {
-            'product_id': p.product_id,
-            'product_name': db.session.query(Product.name).filter(Product.id == p.product_id).scalar(),
-            'total_revenue': float(p.total_revenue)
-        } for p in least_products
-    ]
+    rows = db.session.execute(
+        select(ranked).where((ranked.c.best_rank <= 5) | (ranked.c.least_rank <= 5))
+    ).all()
+
+    def product_list(rank):
+        return [
+            {
+                'product_id': p.product_id,
+                'product_name': p.product_name,
+                'total_revenue': float(p.total_revenue)
+            } for p in sorted((r for r in rows if getattr(r, rank) <= 5), key=lambda r: getattr(r, rank))
+        ]
 
-    return jsonify({
-        'totalProducts': total_products,
-        'totalSales': float(total_sales),
-        'totalExpenses': float(total_expenses),
+    return {
+        'totalProducts': totals.total_products,
+        'totalSales': float(totals.total_sales),
+        'totalExpenses': float(totals.total_expenses),
         'salesLast7Days': sales_last_7_days,
         'expensesLast7Days': expenses_last_7_days,
-        'bestPerformingProducts': best_products_list,
-        'leastPerformingProducts': least_products_list
-    })
+        'bestPerformingProducts': product_list('best_rank'),
+        'leastPerformingProducts': product_list('least_rank')
+    }
+
+
+@dashboard_bp.route('/metrics', methods=['GET'])
+@token_required
+def get_dashboard_metrics():
+    """
+    Dashboard figures, cached (see dashboard_cache):
+
+    - totalProducts: products not in status 9.
+    - totalSales, salesLast7Days: total_amount of active sales, from
+      daily_sales_summary. Soft-deleted (status 0) and voided (status 9)
+      sales are left out; before the rollups they were counted.
+    - totalExpenses, expensesLast7Days: total_amount of active (status 1)
+      expenses, from daily_expense_summary. Before the rollups every
+      expense not in status 9 was counted.
+    - bestPerformingProducts, leastPerformingProducts: top and bottom five
+      products by line revenue over sales and lines not in status 9.
+    """
+    return jsonify(dashboard_cache.get_or_compute('metrics', _compute_metrics))
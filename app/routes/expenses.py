@@ -2,7 +2,13 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Account, Expense, ExpenseItem, GeneralLedger
 from app.utils.auth import token_required
-from app.utils.gl_utils import post_to_ledger, generate_transaction_number
+from app.utils.replica import read_replica
+from app.utils.cache import dashboard_cache
+from app.utils.filters import filter_date_range, filter_status
+from app.utils.pagination import paginate, page_body
+from app.utils.account_cache import chart_of_accounts
+from app.utils.gl_utils import post_to_ledger, reverse_transaction, generate_transaction_number
+from app.utils.rollups import expense_figures, record_expense_change
 from datetime import datetime
 # from flask import Blueprint, jsonify
 from sqlalchemy.orm import joinedload
@@ -30,6 +36,10 @@ def create_expense():
         if not description or not payment_account_id or not items_data:
             return jsonify({"error": "Missing required fields: description, payment_account_id, and items"}), 400
 
+        payment_account = chart_of_accounts.get(payment_account_id)
+        if not payment_account:
+            return jsonify({"error": "Invalid payment account"}), 400
+
         # Convert expense_date to datetime
         expense_date_obj = datetime.strptime(expense_date, '%Y-%m-%d')
 
@@ -50,6 +60,7 @@ def create_expense():
 
         # --- Insert expense items ---
         total_amount = 0
+        gl_entries = []
         for item in items_data:
             account_id = item.get('account_id')
             item_name = item.get('item_name')
@@ -58,6 +69,10 @@ def create_expense():
             if not account_id or not item_name or amount <= 0:
                 return jsonify({"error": "Each item must have account_id, item_name, and amount > 0"}), 400
 
+            item_account = chart_of_accounts.get(account_id)
+            if not item_account:
+                return jsonify({"error": f"Invalid expense account {account_id}"}), 400
+
             total_amount += amount
 
             # Save the expense item
@@ -70,24 +85,19 @@ def create_expense():
             )
             db.session.add(expense_item)
 
-        # Update total
-        expense.total_amount = total_amount
-
-        # --- Post to General Ledger ---
-        # Debit each expense account for its amount
-        gl_entries = []
-        for item in expense.items:
-            account=db.session.query(Account).filter_by(id=item.account_id).first()  # Ensure account exists
+            # --- GL: debit each expense account for its amount ---
             gl_entries.append({
-                "account_id": account.code,
+                "account_id": item_account.code,
                 "transaction_type": "Debit",
-                "amount": item.amount
+                "amount": amount
             })
-        account=db.session.query(Account).filter_by(id=payment_account_id).first()  # Ensure account exists
+
+        # Update total
+        expense.total_amount = total_amount
 
         # Credit payment account with total
         gl_entries.append({
-            "account_id": account.code,
+            "account_id": payment_account.code,
             "transaction_type": "Credit",
             "amount": total_amount
         })
@@ -99,9 +109,11 @@ def create_expense():
             description=f"Expense #{expense.id}: {description}",
             transaction_date=expense_date_obj
         )
+        record_expense_change(None, expense_figures(expense))
 
         # Commit everything
         db.session.commit()
+        dashboard_cache.invalidate()
 
         return jsonify({
             "message": "Expense created and posted to GL successfully",
@@ -110,15 +122,33 @@ def create_expense():
             "total_amount": total_amount
         }), 201
 
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 # --- Get all expenses ---
+EXPENSES_ORDER = (Expense.expense_date, Expense.id)  # ix_expense_status_date under the default status
+
+
+def expenses_list_query():
+    """Expenses filtered by ?status= (default: active) and ?from=/?to=, before ordering."""
+    query = filter_status(Expense.query, Expense.status, default=[1])
+    return filter_date_range(query, Expense.expense_date)
+
+
 @token_required
 @expenses_bp.route('/', methods=['GET'])
+@read_replica
 def get_expenses():
-    expenses = Expense.query.filter_by( status=1).all()
+    try:
+        expenses, next_cursor = paginate(expenses_list_query(), *EXPENSES_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     data = [{
         "id": e.id,
         "description": e.description,
@@ -140,7 +170,7 @@ def get_expenses():
         ]
     } for e in expenses]
     
-    return jsonify(data)
+    return jsonify(page_body(data, next_cursor))
 
 
 
@@ -168,6 +198,7 @@ def get_expense(id):
 def update_expense(id):
     expense = Expense.query.get_or_404(id)
     data = request.json
+    before = expense_figures(expense)
     new_amount = data.get('amount', expense.amount)
     new_description = data.get('description', expense.description)
     new_category = data.get('category', expense.category)
@@ -175,18 +206,7 @@ def update_expense(id):
 
     # Reverse previous GL entries
     if expense.transaction_no:
-        original_entries = GeneralLedger.query.filter_by(transaction_no=expense.transaction_no).all()
-        for entry in original_entries:
-            reverse_type = 'Credit' if entry.transaction_type == 'Debit' else 'Debit'
-            reverse_entry = GeneralLedger(
-                account_id=entry.account_id,
-                transaction_type=reverse_type,
-                amount=entry.amount,
-                description=f"Reversal of {entry.description} before update",
-                transaction_date=datetime.utcnow(),
-                transaction_no=entry.transaction_no
-            )
-            db.session.add(reverse_entry)
+        reverse_transaction(expense.transaction_no, "Reversal of {} before update")
 
     # Update expense fields
     expense.amount = new_amount
@@ -206,8 +226,10 @@ def update_expense(id):
         {"account_id": 1, "transaction_type": "Credit", "amount": new_amount}
     ]
     post_to_ledger(entries, transaction_no_id=txn_id, description=f"Updated Expense #{expense.id}: {expense.description}")
+    record_expense_change(before, expense_figures(expense))
 
     db.session.commit()
+    dashboard_cache.invalidate()
     return jsonify({"message": "Expense updated with GL entries", "expense_id": expense.id})
 
 
@@ -244,51 +266,19 @@ def update_expense(id):
 @expenses_bp.route('/<int:id>', methods=['DELETE'])
 def delete_expense(id):
     expense = Expense.query.get_or_404(id)
+    before = expense_figures(expense)
 
     # Reverse GL entries for the main transaction
+    # (the entries already cover every item and the payment account)
     if expense.transaction_no:
-        original_entries = GeneralLedger.query.filter_by(transaction_no=expense.transaction_no).all()
-        for entry in original_entries:
-            reverse_type = 'Credit' if entry.transaction_type == 'Debit' else 'Debit'
-            reverse_entry = GeneralLedger(
-                account_id=entry.account_id,
-                transaction_type=reverse_type,
-                amount=entry.amount,
-                description=f"Reversal of {entry.description} on expense deletion",
-                transaction_date=datetime.utcnow(),
-                transaction_no=entry.transaction_no
-            )
-            db.session.add(reverse_entry)
-
-        # Reverse each expense item individually as double entry
-        for item in expense.items:
-            if item.account_id and item.amount:
-                # Reverse entry for the item account
-                reverse_item_entry = GeneralLedger(
-                    account_id=item.account_id,
-                    transaction_type='Credit',  # Assuming original was Debit
-                    amount=item.amount,
-                    description=f"Reversal of expense item {item.item_name}",
-                    transaction_date=datetime.utcnow(),
-                    transaction_no=expense.transaction_no
-                )
-                db.session.add(reverse_item_entry)
-
-                # Counter-entry for payment account
-                reverse_payment_entry = GeneralLedger(
-                    account_id=expense.payment_account_id,
-                    transaction_type='Debit',  # Assuming original was Credit
-                    amount=item.amount,
-                    description=f"Reversal of payment for expense item {item.item_name}",
-                    transaction_date=datetime.utcnow(),
-                    transaction_no=expense.transaction_no
-                )
-                db.session.add(reverse_payment_entry)
+        reverse_transaction(expense.transaction_no, "Reversal of {} on expense deletion")
 
     # Soft delete by setting status = 9
     expense.status = 9
     expense.updated_at = datetime.utcnow()
+    record_expense_change(before, expense_figures(expense))
     db.session.commit()
+    dashboard_cache.invalidate()
 
     return jsonify({"message": "Expense marked deleted (status=9) and GL entries reversed", "expense_id": id})
 
@@ -4,6 +4,9 @@ from app.models import Product, Category
 from datetime import datetime
 
 from app.utils.auth import token_required
+from app.utils.replica import read_replica
+from app.utils.filters import filter_status
+from app.utils.pagination import paginate, page_body, page_limit
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
@@ -26,48 +29,57 @@ def add_product():
     db.session.commit()
     return jsonify({"message": "Product added", "product_id": product.id}), 201
 
+def _catalog_query():
+    """Product columns plus the active category's name, in one outer join."""
+    return db.session.query(
+        Product.id,
+        Product.name,
+        Product.sku,
+        Product.category_id,
+        Category.name.label('category_name'),
+        Product.quantity,
+        Product.price,
+        Product.status,
+        Product.created_at,
+        Product.updated_at
+    ).outerjoin(Category, (Category.id == Product.category_id) & (Category.status == 1))
+
+
+def _product_row(p):
+    return {
+        "id": p.id,
+        "name": p.name,
+        "sku": p.sku,
+        "category_id": p.category_id,
+        "category_name": p.category_name,
+        "quantity": p.quantity,
+        "price": p.price,
+        "status": p.status,
+        "created_at": p.created_at,
+        "updated_at": p.updated_at
+    }
+
+
 # --- View all products ---
 @token_required
 @inventory_bp.route('/products', methods=['GET'])
+@read_replica
 def list_products():
-    products = Product.query.all()
-    result = []
-    for p in products:
-        category =db.session.query(Category).filter_by(id = p.category_id,status=1).first()
-        result.append({
-            "id": p.id,
-            "name": p.name,
-            "sku": p.sku,
-            "category_id": p.category_id,
-            "category_name": category.name if category else None,
-            "quantity": p.quantity,
-            "price": p.price,
-            "status": p.status,
-            "created_at": p.created_at,
-            "updated_at": p.updated_at
-        })
-    return jsonify(result)
+    try:
+        query = filter_status(_catalog_query(), Product.status)
+        products, next_cursor = paginate(query, Product.id, descending=False)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(page_body([_product_row(p) for p in products], next_cursor))
 
 
 # --- Find product by ID ---
 @token_required
 @inventory_bp.route('/products/<int:id>', methods=['GET'])
 def get_product(id):
-    p = Product.query.get_or_404(id)
-    category =db.session.query(Category).filter_by(id = p.category_id,status=1).first()
-
-    return jsonify({
-        "id": p.id,
-        "name": p.name,
-        "sku": p.sku,
-        "category_id": p.category_id,
-        "category_name": category.name if category else None,
-        "quantity": p.quantity,
-        "price": p.price,
-        "status": p.status,
-        "created_at": p.created_at,
-        "updated_at": p.updated_at
-    })
+    p = _catalog_query().filter(Product.id == id).first_or_404()
+    return jsonify(_product_row(p))
 
 # --- Find product by SKU or Name ---
 @token_required
@@ -75,30 +87,16 @@ def get_product(id):
 def search_product():
     sku = request.args.get('sku')
     name = request.args.get('name')
-    query = Product.query
+    query = _catalog_query()
     if sku:
-        query = query.filter_by(sku=sku)
+        query = query.filter(Product.sku == sku)
     if name:
         query = query.filter(Product.name.ilike(f"%{name}%"))
-    products = query.all()
-    result = []
-    for p in products:
-        category =db.session.query(Category).filter_by(id = p.category_id,status=1).first()
-
-        result.append({
-            "id": p.id,
-            "name": p.name,
-            "sku": p.sku,
-            "category_id": p.category_id,
-            "category_name": category.name if category else None,
-
-            "quantity": p.quantity,
-            "price": p.price,
-            "status": p.status,
-            "created_at": p.created_at,
-            "updated_at": p.updated_at
-        })
-    return jsonify(result)
+    try:
+        products = query.order_by(Product.id).limit(page_limit()).all()  # first matches only
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([_product_row(p) for p in products])
 
 # --- Update product (quantity cannot be manually updated here) ---
 @token_required
@@ -1,21 +1,39 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import GeneralLedger, Account
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, tuple_
 
 from app.utils.auth import token_required
+from app.utils.replica import read_replica
+from app.utils.filters import date_range, filter_date_range, filter_status
+from app.utils.pagination import paginate, page_body, page_limit, encode_cursor, decode_cursor
+from app.utils.streaming import wants_stream, stream_query, ndjson_response
+from app.utils.account_cache import chart_of_accounts
+from app.utils.balances import apply_balance_deltas, normal_sign
+from app.utils.periods import PeriodClosedError, balances_as_of, ensure_period_open
 
 ledger_bp = Blueprint('ledger', __name__, url_prefix='/ledger')
 
+
+def _balance_row(entry):
+    return {"account_id": entry.account_id, "transaction_type": entry.transaction_type, "amount": entry.amount}
+
 # --- Add a transaction ---
 @token_required
 @ledger_bp.route('/', methods=['POST'])
 def add_transaction():
     data = request.json
-    account = Account.query.filter_by(id=data['account_id'], status=1).first()
-    if not account:
+    account = chart_of_accounts.get(data['account_id'])
+    if not account or account.status != 1:
         return jsonify({"error": "Active account not found"}), 404
 
+    try:
+        ensure_period_open(data.get('transaction_date'))
+    except PeriodClosedError as e:
+        return jsonify({"error": str(e)}), 400
+
     entry = GeneralLedger(
         account_id=account.id,
         transaction_type=data['transaction_type'],
@@ -27,30 +45,49 @@ def add_transaction():
         updated_at=datetime.utcnow()
     )
     db.session.add(entry)
+    apply_balance_deltas([_balance_row(entry)])
     db.session.commit()
     return jsonify({"message": "Transaction recorded", "entry_id": entry.id})
 
 
+def _ledger_entry(e):
+    account = chart_of_accounts.get(e.account_id)
+    return {
+        "entry_id": e.id,
+        "account_name": account.name if account else None,
+        "transaction_type": e.transaction_type,
+        "amount": e.amount,
+        "description": e.description,
+        "transaction_date": e.transaction_date,
+        "status": e.status,
+        "created_at": e.created_at,
+        "updated_at": e.updated_at
+    }
+
+
+LEDGER_ORDER = (GeneralLedger.transaction_date, GeneralLedger.id)  # ix_general_ledger_date
+
+
+def ledger_list_query():
+    """GL entries filtered by ?status= and ?from=/?to=, before ordering."""
+    query = filter_status(GeneralLedger.query, GeneralLedger.status)
+    return filter_date_range(query, GeneralLedger.transaction_date)
+
+
 # --- Get all ledger entries ---
 @token_required
 @ledger_bp.route('/', methods=['GET'])
+@read_replica
 def get_ledger():
-    entries = GeneralLedger.query.all()
-    data = []
-    for e in entries:
-        account = Account.query.get(e.account_id)
-        data.append({
-            "entry_id": e.id,
-            "account_name": account.name if account else None,
-            "transaction_type": e.transaction_type,
-            "amount": e.amount,
-            "description": e.description,
-            "transaction_date": e.transaction_date,
-            "status": e.status,
-            "created_at": e.created_at,
-            "updated_at": e.updated_at
-        })
-    return jsonify(data)
+    try:
+        query = ledger_list_query()
+        if wants_stream():
+            return ndjson_response(stream_query(query, *LEDGER_ORDER), _ledger_entry)
+        entries, next_cursor = paginate(query, *LEDGER_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(page_body([_ledger_entry(e) for e in entries], next_cursor))
 
 
 # --- Get ledger by account ---
@@ -72,15 +109,114 @@ def get_ledger_by_account(account_id):
     return jsonify({"account": account.name, "entries": data})
 
 
+def statement_query(account_id, sign=1, cursor=None):
+    """
+    One account's entries in (transaction_date, id) order, ?from=/?to=
+    applied, each with the running signed total since the first row
+    returned (ix_general_ledger_account_date supplies the order).
+    """
+    signed_amount = sign * case(
+        (GeneralLedger.transaction_type == 'Debit', GeneralLedger.amount), else_=-GeneralLedger.amount
+    )
+    running = func.sum(signed_amount).over(
+        order_by=(GeneralLedger.transaction_date, GeneralLedger.id), rows=(None, 0)
+    )
+    query = db.session.query(
+        GeneralLedger.id,
+        GeneralLedger.transaction_date,
+        GeneralLedger.transaction_no,
+        GeneralLedger.transaction_type,
+        GeneralLedger.amount,
+        GeneralLedger.description,
+        running.label('running_total')
+    ).filter(GeneralLedger.account_id == account_id, GeneralLedger.status != 9)
+    query = filter_date_range(query, GeneralLedger.transaction_date)
+    if cursor:
+        query = query.filter(
+            tuple_(GeneralLedger.transaction_date, GeneralLedger.id) > tuple_(cursor[0], cursor[1])
+        )
+    return query.order_by(GeneralLedger.transaction_date, GeneralLedger.id)
+
+
+# --- Account statement: opening balance, running balance, paged ---
+@ledger_bp.route('/account/<int:account_id>/statement', methods=['GET'])
+@token_required
+@read_replica
+def get_account_statement(account_id):
+    """
+    Entries for one account in (transaction_date, id) order with a running
+    balance, ?from=&to= inclusive. Pages continue from ?after=, whose cursor
+    carries the balance reached so far, so no page re-reads earlier rows.
+    """
+    account = chart_of_accounts.get(account_id)
+    if not account or account.status != 1:
+        return jsonify({"error": "Active account not found"}), 404
+    sign = normal_sign(account.account_type)
+
+    try:
+        start, end = date_range()
+        limit = page_limit()
+        after = request.args.get('after')
+        cursor = decode_cursor(after, 3) if after else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Balance carried into the range: closed-period snapshot plus GL delta
+    opening = 0.0
+    if start:
+        debit, credit = balances_as_of(start - timedelta(days=1), [account.id]).get(account.id, (0.0, 0.0))
+        opening = round(sign * (debit - credit), 2)
+    carried = float(cursor[2]) if cursor else opening
+
+    rows = statement_query(account.id, sign, cursor).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    entries = [{
+        "entry_id": r.id,
+        "transaction_date": r.transaction_date,
+        "transaction_no": r.transaction_no,
+        "description": r.description,
+        "debit": r.amount if r.transaction_type == 'Debit' else 0,
+        "credit": r.amount if r.transaction_type == 'Credit' else 0,
+        "balance": round(carried + float(r.running_total), 2)
+    } for r in rows]
+
+    closing = entries[-1]["balance"] if entries else carried
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([last.transaction_date, last.id, closing])
+
+    return jsonify({
+        "account": {"id": account.id, "code": account.code, "name": account.name, "account_type": account.account_type},
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "opening_balance": opening,
+        "carried_balance": carried,
+        "closing_balance": closing,
+        "entries": entries,
+        "next_cursor": next_cursor
+    })
+
+
 # --- Update ledger entry ---
 @token_required
 @ledger_bp.route('/<int:entry_id>', methods=['PUT'])
 def update_entry(entry_id):
     entry = GeneralLedger.query.get_or_404(entry_id)
     data = request.json
+    old_row = _balance_row(entry) if entry.status != 9 else None
+
+    try:
+        ensure_period_open(entry.transaction_date)
+        ensure_period_open(data.get('transaction_date'))
+    except PeriodClosedError as e:
+        return jsonify({"error": str(e)}), 400
+
     if "account_id" in data:
-        account = Account.query.filter_by(id=data['account_id'], status=1).first()
-        if not account:
+        account = chart_of_accounts.get(data['account_id'])
+        if not account or account.status != 1:
             return jsonify({"error": "Active account not found"}), 404
         entry.account_id = account.id
 
@@ -90,6 +226,11 @@ def update_entry(entry_id):
     entry.transaction_date = data.get('transaction_date', entry.transaction_date)
     entry.updated_at = datetime.utcnow()
     entry.status = 1
+
+    # Swap the old figures for the new ones in account_balance
+    if old_row:
+        apply_balance_deltas([old_row], sign=-1)
+    apply_balance_deltas([_balance_row(entry)])
     db.session.commit()
     return jsonify({"message": "Transaction updated", "entry_id": entry.id})
 
@@ -3,7 +3,10 @@ from datetime import datetime
 from app import db
 from app.models import Account, Payment, Sale, GeneralLedger
 from app.utils.auth import token_required
-from app.utils.gl_utils import post_to_ledger, generate_transaction_number
+from app.utils.cache import debtors_cache
+from app.utils.account_cache import chart_of_accounts
+from app.utils.gl_utils import post_to_ledger, reverse_transaction, generate_transaction_number
+from app.utils.rollups import sale_figures, record_sale_change
 from sqlalchemy.orm import joinedload
 
 
@@ -35,6 +38,7 @@ def add_payment():
     sale = Sale.query.get(data['sale_id'])
     if not sale:
         return jsonify({"error": "Sale not found"}), 404
+    before = sale_figures(sale)
 
     amount = data['amount']
     payment_type = data.get('payment_type', 'Cash')
@@ -52,7 +56,7 @@ def add_payment():
         return jsonify({'error': 'Invalid transaction date format. Use YYYY-MM-DD'}), 400
     
     # Validate payment account
-    payment_account = Account.query.get(payment_account_id)
+    payment_account = chart_of_accounts.get(payment_account_id)
     if not payment_account:
         return jsonify({'error': 'Invalid payment account selected'}), 400
 
@@ -66,17 +70,17 @@ def add_payment():
         {"account_id": payment_account.code, "transaction_type": "Debit", "amount": amount},  # Cash/Bank
         {"account_id": 1100, "transaction_type": "Credit", "amount": amount}  # Accounts Receivable
     ]
-    gl_entries = post_to_ledger(
-        entries,
-        transaction_no_id=txn_id,
-        description=f"Payment for Sale #{sale.id}",
-        transaction_date=transaction_date
-    )
+    try:
+        post_to_ledger(
+            entries,
+            transaction_no_id=txn_id,
+            description=f"Payment for Sale #{sale.id}",
+            transaction_date=transaction_date
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
 
-    # Link payment to transaction
-    payment.transaction_no = txn_id
-    payment.updated_at = datetime.utcnow()
-    
     # ----------------- Create Payment -----------------
     payment = Payment(
         sale_id=sale.id,
@@ -99,8 +103,10 @@ def add_payment():
     sale.balance = max(sale.total_amount - total_paid, 0)  # Ensure it doesn't go negative
     sale.payment_status = payment_status
     sale.updated_at = datetime.utcnow()
+    record_sale_change(before, sale_figures(sale))
 
     db.session.commit()
+    debtors_cache.invalidate()
 
     return jsonify({
         "message": "Payment recorded with GL entries",
@@ -144,19 +150,7 @@ def update_payment(payment_id):
 
     # Reverse previous GL entries
     if payment.transaction_no:
-        original_entries = GeneralLedger.query.filter_by(transaction_no=payment.transaction_no, status=1).all()
-        for entry in original_entries:
-            reverse_type = 'Credit' if entry.transaction_type == 'Debit' else 'Debit'
-            reverse_entry = GeneralLedger(
-                account_id=entry.account_id,
-                transaction_type=reverse_type,
-                amount=entry.amount,
-                description=f"Reversal of {entry.description} before update",
-                transaction_date=datetime.utcnow(),
-                transaction_no=payment.transaction_no,
-                status=1
-            )
-            db.session.add(reverse_entry)
+        reverse_transaction(payment.transaction_no, "Reversal of {} before update", active_only=True)
 
     # Update payment fields
     payment.amount = new_amount
@@ -179,6 +173,7 @@ def update_payment(payment_id):
     recalc_sale_payment_status(sale.id)
 
     db.session.commit()
+    debtors_cache.invalidate()
     return jsonify({
         "message": "Payment updated with GL entries",
         "payment_id": payment.id,
@@ -196,19 +191,7 @@ def delete_payment(payment_id):
 
     # Reverse GL entries
     if payment.transaction_no:
-        original_entries = GeneralLedger.query.filter_by(transaction_no=payment.transaction_no, status=1).all()
-        for entry in original_entries:
-            reverse_type = 'Credit' if entry.transaction_type == 'Debit' else 'Debit'
-            reverse_entry = GeneralLedger(
-                account_id=entry.account_id,
-                transaction_type=reverse_type,
-                amount=entry.amount,
-                description=f"Reversal of {entry.description} on deletion",
-                transaction_date=datetime.utcnow(),
-                transaction_no=payment.transaction_no,
-                status=1
-            )
-            db.session.add(reverse_entry)
+        reverse_transaction(payment.transaction_no, "Reversal of {} on deletion", active_only=True)
 
     # Soft delete payment
     payment.status = 0
@@ -218,6 +201,7 @@ def delete_payment(payment_id):
     recalc_sale_payment_status(sale.id)
 
     db.session.commit()
+    debtors_cache.invalidate()
 
     return jsonify({
         "message": "Payment soft-deleted and GL reversed",
@@ -0,0 +1,91 @@
+from flask import Blueprint, request, jsonify
+from app import db
+from app.models import FiscalPeriod
+from app.utils.periods import close_period, reopen_latest_period, balances_as_of, to_date
+from app.utils.account_cache import chart_of_accounts
+from datetime import datetime
+
+from app.utils.auth import permission_required, token_required
+
+periods_bp = Blueprint('periods', __name__, url_prefix='/periods')
+
+CLOSE_PERIODS = 'close_periods'  # closing and reopening months
+
+
+# --- List closed periods ---
+@periods_bp.route('/', methods=['GET'])
+@token_required
+def list_periods():
+    periods = FiscalPeriod.query.filter_by(status=1).order_by(FiscalPeriod.period_start.desc()).all()
+    return jsonify([{
+        "id": p.id,
+        "period": p.period_start.strftime('%Y-%m'),
+        "period_start": p.period_start.isoformat(),
+        "period_end": p.period_end.isoformat(),
+        "closed_at": p.closed_at,
+        "closing_transaction_no": p.closing_transaction_no
+    } for p in periods])
+
+
+# --- Close a month ---
+@periods_bp.route('/close', methods=['POST'])
+@permission_required(CLOSE_PERIODS)
+def close():
+    data = request.json or {}
+    try:
+        year = int(data['year'])
+        month = int(data['month'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "year and month are required"}), 400
+
+    try:
+        period = close_period(year, month, post_closing_entries=bool(data.get('post_closing_entries', False)))
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    db.session.commit()
+    return jsonify({
+        "message": f"Period {period.period_start:%Y-%m} closed",
+        "period_end": period.period_end.isoformat(),
+        "closing_transaction_no": period.closing_transaction_no
+    }), 201
+
+
+# --- Reopen the latest closed month ---
+@periods_bp.route('/reopen', methods=['POST'])
+@permission_required(CLOSE_PERIODS)
+def reopen():
+    try:
+        period = reopen_latest_period()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    db.session.commit()
+    return jsonify({"message": f"Period {period.period_start:%Y-%m} reopened"})
+
+
+# --- Account balances as of a date (snapshot + delta) ---
+@periods_bp.route('/balances', methods=['GET'])
+@token_required
+def balances():
+    try:
+        as_of = to_date(request.args.get('as_of')) or datetime.utcnow().date()
+    except ValueError:
+        return jsonify({"error": "Invalid as_of date. Use YYYY-MM-DD"}), 400
+
+    totals = balances_as_of(as_of)
+    result = []
+    for account_id, (debit, credit) in sorted(totals.items()):
+        account = chart_of_accounts.get(account_id)
+        result.append({
+            "account_id": account_id,
+            "account_code": account.code if account else None,
+            "account_name": account.name if account else None,
+            "account_type": account.account_type if account else None,
+            "debit": round(debit, 2),
+            "credit": round(credit, 2),
+            "balance": round(debit - credit, 2)
+        })
+    return jsonify({"as_of": as_of.isoformat(), "balances": result})
@@ -1,20 +1,44 @@
-from flask import Blueprint, jsonify
-from app.models import Category, GeneralLedger, SaleItem, PurchaseOrder, Expense,Customer, Supplier, Sale, PurchaseOrder, Product, Account
+from flask import Blueprint, jsonify, request
+from app.models import Category, GeneralLedger, SaleItem, PurchaseOrder, PurchaseOrderItem, Expense,Customer, Supplier, Sale, PurchaseOrder, Product, Account, AccountBalance
 from app import db
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import joinedload
 
 from app.utils.auth import token_required
+from app.utils.replica import use_read_replica
+from app.utils.account_cache import chart_of_accounts
+from app.utils.filters import add_months, date_range, filter_date_range, filter_status
+from app.utils.pagination import paginate, page_body
+from app.utils.streaming import wants_stream, stream_query, ndjson_response
+from app.utils.balances import normal_sign
+from app.utils.cache import debtors_cache
+from app.utils.cash_flow import cash_flow_statement
+from app.routes.ledger import LEDGER_ORDER
+from app.utils.periods import (
+    GL_STATUS_CLOSING, balances_as_of, balances_between, closing_entry_totals, ledger_totals, to_date
+)
 
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
+reports_bp.before_request(use_read_replica)  # read-only: served from the replica when healthy
 
 # ------------------ General Ledger ------------------
-@token_required
-@reports_bp.route('/general-ledger', methods=['GET'])
-def general_ledger():
-    ledgers = db.session.query(
+def _general_ledger_row(g):
+    return {
+        "id": g.id,
+        "transaction_date": g.transaction_date.strftime('%Y-%m-%d'),
+        "transaction_type": g.transaction_type,
+        "amount": float(g.amount),
+        "description": g.description,
+        "account_name": g.account_name,
+        "account_type": g.account_type
+    }
+
+
+def general_ledger_query():
+    """Non-voided GL rows with their account, filtered by ?status= and ?from=/?to=, before ordering."""
+    query = db.session.query(
         GeneralLedger.id,
         GeneralLedger.transaction_date,
         GeneralLedger.transaction_type,
@@ -22,58 +46,127 @@ def general_ledger():
         GeneralLedger.description,
         Account.name.label('account_name'),
         Account.account_type
-    ).join(Account, GeneralLedger.account_id == Account.id).filter(GeneralLedger.status != 9).order_by(GeneralLedger.transaction_date.desc()).all()
+    ).join(Account, GeneralLedger.account_id == Account.id).filter(GeneralLedger.status != 9)
+    query = filter_status(query, GeneralLedger.status)
+    return filter_date_range(query, GeneralLedger.transaction_date)
 
-    result = [{
-        "id": g.id,
-        "transaction_date": g.transaction_date.strftime('%Y-%m-%d'),
-        "transaction_type": g.transaction_type,
-        "amount": float(g.amount),
-        "description": g.description,
-        "account_name": g.account_name,
-        "account_type": g.account_type
-    } for g in ledgers]
 
-    return jsonify(result)
+@reports_bp.route('/general-ledger', methods=['GET'])
+@token_required
+def general_ledger():
+    try:
+        query = general_ledger_query()
+        if wants_stream():
+            return ndjson_response(stream_query(query, *LEDGER_ORDER), _general_ledger_row)
+        ledgers, next_cursor = paginate(query, *LEDGER_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(page_body([_general_ledger_row(g) for g in ledgers], next_cursor))
 
 # ------------------ Trial Balance ------------------
-@token_required
 @reports_bp.route('/trial-balance', methods=['GET'])
+@token_required
 def trial_balance():
-    # Group by account
-    accounts = db.session.query(
-        Account.id,
-        Account.name,
-        Account.account_type,
-        func.coalesce(func.sum(GeneralLedger.amount), 0).label('balance')
-    ).join(GeneralLedger, GeneralLedger.account_id == Account.id).filter(GeneralLedger.status != 9).group_by(Account.id).all()
+    """
+    Debit and credit totals for every account (zero-activity accounts
+    included) plus a totals row that checks the books balance.
+
+    ?as_of= (or ?to= / ?period=) gives balances at the end of that day from
+    the closed-period snapshot plus one conditional-aggregation pass over
+    the GL since it; ?from= turns it into movement for the range. Without
+    dates it reads the maintained account_balance totals.
+    """
+    try:
+        start, end = date_range()
+        as_of = to_date(request.args.get('as_of')) if request.args.get('as_of') else end
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Naming every account lets the GL pass use the (account_id, transaction_date) index
+    account_ids = [a.id for a in chart_of_accounts.accounts()]
+    if start:
+        totals = balances_between(start, as_of or datetime.utcnow().date(), account_ids)
+    elif as_of:
+        totals = balances_as_of(as_of, account_ids)
+    else:
+        totals = {b.account_id: (b.debit_total, b.credit_total) for b in AccountBalance.query.all()}
+
+    # Every active account, plus any inactive one that still carries a balance
+    accounts = sorted(
+        (a for a in chart_of_accounts.accounts() if a.status == 1 or a.id in totals),
+        key=lambda a: a.code
+    )
 
-    result = [{
-        "account_id": a.id,
-        "account_name": a.name,
-        "account_type": a.account_type,
-        "balance": float(a.balance)
-    } for a in accounts]
+    result = []
+    total_debit = total_credit = 0.0
+    for a in accounts:
+        debit, credit = (float(v or 0) for v in totals.get(a.id, (0.0, 0.0)))
+        total_debit += debit
+        total_credit += credit
+        result.append({
+            "account_id": a.id,
+            "account_code": a.code,
+            "account_name": a.name,
+            "account_type": a.account_type,
+            "debit": round(debit, 2),
+            "credit": round(credit, 2),
+            "balance": round(debit - credit, 2)
+        })
+
+    total_debit, total_credit = round(total_debit, 2), round(total_credit, 2)
+    result.append({
+        "account_id": None,
+        "account_code": None,
+        "account_name": "Total",
+        "account_type": None,
+        "debit": total_debit,
+        "credit": total_credit,
+        "balance": round(total_debit - total_credit, 2),
+        "is_total": True,
+        "balanced": abs(total_debit - total_credit) < 0.005
+    })
 
     return jsonify(result)
 
 # ------------------ Profit & Loss ------------------
-@token_required
+def _account_ids(*types):
+    """Ids of accounts whose type contains any of the given words (e.g. 'Revenue')."""
+    return [a.id for a in chart_of_accounts.accounts()
+            if a.account_type and any(t.lower() in a.account_type.lower() for t in types)]
+
+
 @reports_bp.route('/profit-loss', methods=['GET'])
+@token_required
 def profit_loss():
-    # Total sales
-    total_sales = db.session.query(func.coalesce(func.sum(GeneralLedger.amount), 0)).join(Account).filter(
-        GeneralLedger.status != 9,
-        Account.account_type.ilike('%Revenue%')
-    ).scalar()
-
-    # Total expenses
-    total_expenses = db.session.query(func.coalesce(func.sum(GeneralLedger.amount), 0)).join(Account).filter(
-        GeneralLedger.status != 9,
-        Account.account_type.ilike('%Expense%')
-    ).scalar()
+    try:
+        start, end = date_range()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    revenue_ids = _account_ids('Revenue')
+    expense_ids = _account_ids('Expense')
+
+    if start or end:
+        # Only GL rows in the range, via the (account_id, transaction_date) index
+        totals = ledger_totals(start, end, account_ids=revenue_ids + expense_ids, include_closing=False)
+    else:
+        # Maintained per-account totals, less the entries that closed them into Retained Earnings
+        totals = {b.account_id: [b.debit_total, b.credit_total] for b in AccountBalance.query.filter(
+            AccountBalance.account_id.in_(revenue_ids + expense_ids)
+        )}
+        for account_id, (debit, credit) in closing_entry_totals(revenue_ids + expense_ids).items():
+            row = totals.setdefault(account_id, [0.0, 0.0])
+            row[0] -= debit
+            row[1] -= credit
+
+    # Revenue accounts are credit-natured, expenses debit-natured
+    total_sales = sum(credit - debit for account_id, (debit, credit) in totals.items() if account_id in revenue_ids)
+    total_expenses = sum(debit - credit for account_id, (debit, credit) in totals.items() if account_id in expense_ids)
 
     result = {
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
         "total_sales": float(total_sales),
         "total_expenses": float(total_expenses),
         "net_profit": float(total_sales - total_expenses)
@@ -81,29 +174,138 @@ def profit_loss():
 
     return jsonify(result)
 
-# ------------------ Cash Flow ------------------
+# ------------------ Comparative Profit & Loss ------------------
+PL_INTERVALS = {'month': 1, 'quarter': 3}
+
+
+def _bucket_start(day, interval):
+    month = day.month if interval == 'month' else 3 * ((day.month - 1) // 3) + 1
+    return date(day.year, month, 1)
+
+
+def _bucket_label(day, interval):
+    return f"{day:%Y-%m}" if interval == 'month' else f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+
+
+@reports_bp.route('/profit-loss/comparative', methods=['GET'])
 @token_required
+def comparative_profit_loss():
+    """
+    Income statement with one column per month or quarter (?interval=) for
+    every revenue and expense account, each compared with the same period a
+    year earlier. Columns cover ?from/?to/?period, or the last ?periods=
+    intervals (default 12) up to today. Closing entries are left out.
+    """
+    interval = request.args.get('interval', 'month')
+    if interval not in PL_INTERVALS:
+        return jsonify({"error": "interval must be 'month' or 'quarter'"}), 400
+    step = PL_INTERVALS[interval]
+
+    try:
+        start, end = date_range()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        count = int(request.args.get('periods', 12))
+    except ValueError:
+        return jsonify({"error": "Invalid 'periods'"}), 400
+
+    end = end or datetime.utcnow().date()
+    last = _bucket_start(end, interval)
+    first = _bucket_start(start, interval) if start else add_months(last, -step * (max(1, min(count, 60)) - 1))
+    if first > last:
+        return jsonify({"error": "'from' must be on or before 'to'"}), 400
+
+    buckets = []
+    b = first
+    while b <= last:
+        buckets.append(b)
+        b = add_months(b, step)
+
+    accounts = {a.id: a for a in chart_of_accounts.accounts() if a.account_type in ('Revenue', 'Expense')}
+
+    # One scan: this range and the year before it, grouped by account and period start
+    range_start = datetime.combine(add_months(first, -12), datetime.min.time())
+    range_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    bucket = func.date_trunc(interval, GeneralLedger.transaction_date).label('bucket')
+    rows = db.session.query(
+        GeneralLedger.account_id,
+        bucket,
+        func.sum(case((GeneralLedger.transaction_type == 'Debit', GeneralLedger.amount), else_=0)).label('debit'),
+        func.sum(case((GeneralLedger.transaction_type == 'Credit', GeneralLedger.amount), else_=0)).label('credit'),
+    ).filter(
+        GeneralLedger.account_id.in_(list(accounts)),
+        GeneralLedger.transaction_date >= range_start,
+        GeneralLedger.transaction_date < range_end,
+        GeneralLedger.status.notin_([GL_STATUS_CLOSING, 9]),
+    ).group_by(GeneralLedger.account_id, bucket).all()
+
+    # Amounts on the account's natural side: credit - debit for revenue, debit - credit for expenses
+    amounts = {}
+    for r in rows:
+        sign = normal_sign(accounts[r.account_id].account_type)
+        amounts[(r.account_id, r.bucket.date())] = sign * float(r.debit - r.credit)
+
+    def column_values(account_id, shift=0):
+        return [round(amounts.get((account_id, add_months(b, shift)), 0.0), 2) for b in buckets]
+
+    lines = []
+    totals = {t: {'current': [0.0] * len(buckets), 'prior': [0.0] * len(buckets)} for t in ('Revenue', 'Expense')}
+    for account in sorted(accounts.values(), key=lambda a: a.code):
+        current, prior = column_values(account.id), column_values(account.id, -12)
+        if not any(current) and not any(prior):
+            continue
+        for i in range(len(buckets)):
+            totals[account.account_type]['current'][i] += current[i]
+            totals[account.account_type]['prior'][i] += prior[i]
+        lines.append({
+            "account_id": account.id,
+            "account_code": account.code,
+            "account_name": account.name,
+            "account_type": account.account_type,
+            "amounts": current,
+            "prior_year": prior,
+            "yoy_change": [round(c - p, 2) for c, p in zip(current, prior)]
+        })
+
+    def yoy_pct(current, prior):
+        return [round((c - p) / abs(p) * 100, 1) if p else None for c, p in zip(current, prior)]
+
+    net = [r - e for r, e in zip(totals['Revenue']['current'], totals['Expense']['current'])]
+    prior_net = [r - e for r, e in zip(totals['Revenue']['prior'], totals['Expense']['prior'])]
+    summary = {}
+    for key, current, prior in (
+        ('revenue', totals['Revenue']['current'], totals['Revenue']['prior']),
+        ('expenses', totals['Expense']['current'], totals['Expense']['prior']),
+        ('net_profit', net, prior_net),
+    ):
+        summary[key] = {
+            "amounts": [round(v, 2) for v in current],
+            "prior_year": [round(v, 2) for v in prior],
+            "yoy_change": [round(c - p, 2) for c, p in zip(current, prior)],
+            "yoy_change_pct": yoy_pct(current, prior)
+        }
+
+    return jsonify({
+        "interval": interval,
+        "from": first.isoformat(),
+        "to": end.isoformat(),
+        "periods": [_bucket_label(b, interval) for b in buckets],
+        "accounts": lines,
+        "totals": summary
+    })
+
+
+# ------------------ Cash Flow ------------------
 @reports_bp.route('/cash-flow', methods=['GET'])
+@token_required
 def cash_flow():
-    # Cash inflows: Sales
-    cash_inflow = db.session.query(func.coalesce(func.sum(GeneralLedger.amount), 0)).join(Account).filter(
-        GeneralLedger.status != 9,
-        Account.account_type.ilike('%Cash%')
-    ).scalar()
-
-    # Cash outflows: Purchases + Expenses
-    cash_outflow = db.session.query(func.coalesce(func.sum(GeneralLedger.amount), 0)).join(Account).filter(
-        GeneralLedger.status != 9,
-        Account.account_type.ilike('%Payable%') | Account.account_type.ilike('%Expense%')
-    ).scalar()
-
-    result = {
-        "cash_inflow": float(cash_inflow),
-        "cash_outflow": float(cash_outflow),
-        "net_cash_flow": float(cash_inflow - cash_outflow)
-    }
+    try:
+        start, end = date_range()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify(result)
+    return jsonify(cash_flow_statement(start, end))
 
 
 # from flask import Blueprint, jsonify
@@ -114,28 +316,99 @@ def cash_flow():
 # reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
 
 # ------------------ Debtors Report ------------------
-@token_required
-@reports_bp.route('/debtors-report', methods=['GET'])
-def debtors_report():
-    # Only include customers with outstanding balance > 0
-    debtors = db.session.query(
+AGING_BUCKETS = (('current', 0), ('days_31_60', 31), ('days_61_90', 61), ('over_90', 91))
+
+
+def _aging_bucket(age_days):
+    for name, from_day in reversed(AGING_BUCKETS):
+        if age_days >= from_day:
+            return name
+    return AGING_BUCKETS[0][0]
+
+
+def _open_sales(query):
+    return query.filter(Sale.status.notin_((0, 9)), Sale.balance > 0)
+
+
+def _debtors_aging(today, customer_id=None, include_invoices=False):
+    """
+    Outstanding sale balances per customer, aged by sale date into
+    current / 31-60 / 61-90 / 90+ day buckets with one CASE aggregation.
+    """
+    # A sale is in a bucket once it is at least from_day days old
+    cutoffs = [(name, datetime.combine(today - timedelta(days=from_day - 1), datetime.min.time()))
+               for name, from_day in AGING_BUCKETS[1:]]
+    age_case = case(
+        *[(Sale.sale_date < cutoff, name) for name, cutoff in reversed(cutoffs)],
+        else_=AGING_BUCKETS[0][0]
+    )
+    bucket_columns = [
+        func.coalesce(func.sum(case((age_case == name, Sale.balance), else_=0)), 0).label(name)
+        for name, _ in AGING_BUCKETS
+    ]
+
+    query = _open_sales(db.session.query(
         Customer.id,
         Customer.name,
         Customer.phone,
-        func.coalesce(func.sum(Sale.balance), 0).label('balance')
-    ).join(Sale, Sale.customer_id == Customer.id).filter(
-        Customer.status != 9,
-        Sale.status != 9
-    ).group_by(Customer.id).having(func.sum(Sale.balance) > 0).all()
+        func.count(Sale.id).label('invoice_count'),
+        func.min(Sale.sale_date).label('oldest_sale_date'),
+        func.sum(Sale.balance).label('balance'),
+        *bucket_columns
+    ).join(Sale, Sale.customer_id == Customer.id)).filter(Customer.status != 9)
+    if customer_id is not None:
+        query = query.filter(Customer.id == customer_id)
+    debtors = query.group_by(Customer.id).order_by(func.sum(Sale.balance).desc(), Customer.id).all()
 
     result = [{
         "id": d.id,
         "name": d.name,
         "phone": d.phone,
-        "balance": float(d.balance)
+        "invoice_count": d.invoice_count,
+        "oldest_sale_date": d.oldest_sale_date.strftime('%Y-%m-%d') if d.oldest_sale_date else None,
+        "balance": round(float(d.balance), 2),
+        **{name: round(float(getattr(d, name)), 2) for name, _ in AGING_BUCKETS}
     } for d in debtors]
 
-    return jsonify(result)
+    if include_invoices and result:
+        invoices = {d["id"]: [] for d in result}
+        rows = _open_sales(db.session.query(
+            Sale.id, Sale.customer_id, Sale.sale_number, Sale.sale_date,
+            Sale.total_amount, Sale.total_paid, Sale.balance
+        )).filter(Sale.customer_id.in_(list(invoices))).order_by(Sale.sale_date, Sale.id).all()
+        for r in rows:
+            age_days = (today - r.sale_date.date()).days
+            invoices[r.customer_id].append({
+                "sale_id": r.id,
+                "sale_number": r.sale_number,
+                "sale_date": r.sale_date.strftime('%Y-%m-%d'),
+                "total_amount": float(r.total_amount or 0),
+                "total_paid": float(r.total_paid or 0),
+                "balance": float(r.balance),
+                "age_days": age_days,
+                "bucket": _aging_bucket(age_days),
+            })
+        for d in result:
+            d["invoices"] = invoices[d["id"]]
+
+    return result
+
+
+@reports_bp.route('/debtors-report', methods=['GET'])
+@token_required
+def debtors_report():
+    """
+    Aged debtors. ?customer_id= narrows to one customer and ?include=invoices
+    adds each customer's open invoices. Cached until the next sale or payment.
+    """
+    customer_id = request.args.get('customer_id', type=int)
+    include_invoices = 'invoices' in request.args.get('include', '').split(',')
+    today = datetime.utcnow().date()
+
+    key = ('debtors', today, customer_id, include_invoices)
+    return jsonify(debtors_cache.get_or_compute(
+        key, lambda: _debtors_aging(today, customer_id, include_invoices)
+    ))
 
 
 # ------------------ Creditors Report ------------------
@@ -204,27 +477,36 @@ def stock_list():
 @reports_bp.route('/consumption-list', methods=['GET'])
 def consumption_list():
     seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    
-    # Get sales in the last 7 days that are active
-    sales = db.session.query(Sale).filter(Sale.status != 9, Sale.sale_date >= seven_days_ago).all()
-    
-    result = []
 
-    for sale in sales:
-        for item in sale.items:  # Loop through SaleItems
-            result.append({
-                "id": item.id,
-                "product_name": item.product_name or (item.product.name if item.product else "N/A"),
-                "quantity_sold": item.quantity,
-                "total_amount": float(item.total_price),
-                "sale_date": sale.sale_date.strftime('%Y-%m-%d')
-            })
-    
+    # Items of active sales in the last 7 days: one join, plain range filter on sale_date
+    items = (
+        db.session.query(
+            SaleItem.id,
+            func.coalesce(SaleItem.product_name, Product.name, 'N/A').label('product_name'),
+            SaleItem.quantity,
+            SaleItem.total_price,
+            Sale.sale_date
+        )
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .outerjoin(Product, Product.id == SaleItem.product_id)
+        .filter(Sale.status != 9, Sale.sale_date >= seven_days_ago)
+        .order_by(Sale.sale_date, SaleItem.id)
+        .all()
+    )
+
+    result = [{
+        "id": i.id,
+        "product_name": i.product_name,
+        "quantity_sold": i.quantity,
+        "total_amount": float(i.total_price),
+        "sale_date": i.sale_date.strftime('%Y-%m-%d')
+    } for i in items]
+
     return jsonify(result)
 
 # ------------------ Performance List ------------------
-@token_required
 @reports_bp.route('/performance-list', methods=['GET'])
+@token_required
 def performance_list():
     # Best performing products by revenue
     performance = (
@@ -234,7 +516,15 @@ def performance_list():
             func.coalesce(func.sum(SaleItem.total_price), 0).label('total_revenue')
         )
         .join(SaleItem, SaleItem.product_id == Product.id)
+        .join(Sale, Sale.id == SaleItem.sale_id)
         .filter(Product.status != 9, SaleItem.status != 9)
+    )
+    try:
+        performance = filter_date_range(performance, Sale.sale_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    performance = (
+        performance
         .group_by(Product.id)
         .order_by(func.sum(SaleItem.total_price).desc())
         .all()
@@ -249,8 +539,8 @@ def performance_list():
     return jsonify(result)
 
 # ------------------ Sales List ------------------
-@token_required
 @reports_bp.route('/sales-list', methods=['GET'])
+@token_required
 def sales_list():
     sales = db.session.query(Sale).filter(Sale.status != 9).all()
     result = [{
@@ -263,16 +553,31 @@ def sales_list():
     return jsonify(result)
 
 # ------------------ Purchases List ------------------
-@token_required
 @reports_bp.route('/purchases-list', methods=['GET'])
+@token_required
 def purchases_list():
-    purchases = db.session.query(PurchaseOrder).filter(PurchaseOrder.status != 9).all()
+    # One row per purchased line (the order header has no product or quantity)
+    purchases = db.session.query(
+        PurchaseOrderItem.id,
+        func.coalesce(Product.name, 'N/A').label('product_name'),
+        PurchaseOrderItem.quantity,
+        PurchaseOrderItem.total_price,
+        PurchaseOrder.purchase_date
+    ).join(PurchaseOrder, PurchaseOrder.id == PurchaseOrderItem.purchase_order_id) \
+     .outerjoin(Product, Product.id == PurchaseOrderItem.product_id) \
+     .filter(PurchaseOrder.status != 9, PurchaseOrderItem.status != 9)
+    try:
+        purchases = filter_date_range(purchases, PurchaseOrder.purchase_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    purchases = purchases.order_by(PurchaseOrder.purchase_date, PurchaseOrderItem.id).all()
+
     result = [{
         "id": p.id,
-        "product_name": p.product.name if p.product else "N/A",
+        "product_name": p.product_name,
         "quantity": p.quantity,
-        "total_amount": float(p.total_amount),
-        "purchase_date": p.purchase_date.strftime('%Y-%m-%d')
+        "total_amount": float(p.total_price or 0),
+        "purchase_date": p.purchase_date.strftime('%Y-%m-%d') if p.purchase_date else None
     } for p in purchases]
     return jsonify(result)
 
@@ -280,7 +585,13 @@ def purchases_list():
 @token_required
 @reports_bp.route('/expenses-report', methods=['GET'])
 def expenses_report():
-    expenses = db.session.query(Expense).filter(Expense.status != 9).all()
+    expenses = db.session.query(Expense).filter(Expense.status != 9)
+    try:
+        expenses = filter_date_range(expenses, Expense.expense_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    expenses = expenses.order_by(Expense.expense_date, Expense.id).all()
+
     result = [{
         "id": e.id,
         "description": e.description,
@@ -1,8 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app import db
-from app.models import Account, Payment, Product, PurchaseOrderItem, Sale, SaleItem, GeneralLedger
+from app.models import Account, Payment, Product, Sale, SaleItem, GeneralLedger
 from app.utils.auth import token_required
-from app.utils.gl_utils import post_to_ledger, generate_transaction_number_partone,generate_transaction_number
+from app.utils.replica import read_replica
+from app.utils.cache import dashboard_cache, debtors_cache
+from app.utils.filters import filter_date_range, filter_status
+from app.utils.pagination import paginate, page_body
+from app.utils.account_cache import chart_of_accounts
+from app.utils.stock import (
+    parse_quantity, sum_quantities, lock_products, apply_stock_deltas, adjust_inventory_value, product_costs, unit_cost
+)
+from app.utils.gl_utils import post_to_ledger, reverse_transaction, generate_transaction_number
+from app.utils.rollups import sale_figures, record_sale_change
+from collections import defaultdict
 from datetime import datetime
 
 sales_bp = Blueprint('sales', __name__, url_prefix='/sales')
@@ -32,6 +42,33 @@ def create_sale():
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
+    # ---------- Validate everything before writing anything ----------
+    try:
+        requested = sum_quantities(items)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if any(qty <= 0 for qty in requested.values()):
+        return jsonify({"error": "Item quantities must be greater than zero"}), 400
+
+    if payment_account_id:
+        payment_account = chart_of_accounts.get(payment_account_id)
+        if not payment_account:
+            return jsonify({"error": "Invalid payment account"}), 400
+        credit_account_code = payment_account.code
+    else:
+        credit_account_code = 1100  # Default: Accounts Receivable
+
+    # Load and lock every product in one query (id order); check all stock up front
+    products = lock_products(requested)
+    for product_id, qty in requested.items():
+        product = products.get(product_id)
+        if not product:
+            db.session.rollback()
+            return jsonify({"error": f"Product {product_id} not found"}), 404
+        if (product.quantity or 0) < qty:
+            db.session.rollback()
+            return jsonify({"error": f"Insufficient stock for {product.name}"}), 400
+
     # Create Sale record
     sale = Sale(
         sale_number=data['sale_number'],
@@ -46,41 +83,36 @@ def create_sale():
     total_amount = 0
     cogs_total = 0
 
-    for item_data in items:
-        product = Product.query.get(item_data['product_id'])
-        if not product:
-            return jsonify({"error": f"Product {item_data['product_id']} not found"}), 404
-
-        if product.quantity < item_data['quantity']:
-            return jsonify({"error": f"Insufficient stock for {product.name}"}), 400
+    # Unit costs for every line in one lookup (last purchase price or weighted average)
+    costs = product_costs(requested)
+    cost_method = current_app.config.get('COGS_COST_METHOD', 'last')
 
-        # Get latest purchase price from Purchase table
-        latest_purchase = (
-            PurchaseOrderItem.query
-            .filter(PurchaseOrderItem.product_id == product.id)
-            .order_by(PurchaseOrderItem.created_at.desc())
-            .first()
-        )
-        purchase_price = latest_purchase.unit_price if latest_purchase else item_data.get('purchase_price', 0)
+    for item_data in items:
+        product = products[int(item_data['product_id'])]
+        quantity = parse_quantity(item_data['quantity'])
 
-        # Reduce stock
-        product.quantity -= item_data['quantity']
-        db.session.add(product)
+        purchase_price = unit_cost(costs.get(product.id), cost_method)
+        if purchase_price is None:
+            purchase_price = item_data.get('purchase_price', 0)
 
         # Create SaleItem
         sale_item = SaleItem(
             sale_id=sale.id,
             product_id=product.id,
             product_name=product.name,
-            quantity=item_data['quantity'],
+            quantity=quantity,
             unit_price=item_data['unit_price'],
-            total_price=item_data['unit_price'] * item_data['quantity'],
+            total_price=item_data['unit_price'] * quantity,
             status=1
         )
         db.session.add(sale_item)
 
         total_amount += sale_item.total_price
-        cogs_total += purchase_price * item_data['quantity']
+        cogs_total += purchase_price * quantity
+
+    # Reduce stock for all lines in one UPDATE (rows are already locked)
+    apply_stock_deltas({product_id: -qty for product_id, qty in requested.items()})
+    adjust_inventory_value({product_id: -qty for product_id, qty in requested.items()})
 
     sale.total_amount = total_amount
     balance = total_amount - amount_paid
@@ -97,23 +129,7 @@ def create_sale():
     db.session.flush()
     payment_type=data.get('payment_type', 'Cash')
 
-
-
-
-    # ---------- Determine GL accounts ----------
-    if payment_account_id:
-        payment_account = Account.query.get(payment_account_id)
-        if not payment_account:
-            return jsonify({"error": "Invalid payment account"}), 400
-        credit_account_code = payment_account.code
-    else:
-        credit_account_code = 1100  # Default: Accounts Receivable
-
-
-
     # ---------- Generate GL Transaction ----------
-    txn_id, txn_str = generate_transaction_number_partone('INV', transaction_date=sale_date)
-
     if amount_paid > 0:# double entry for payments
         if amount_paid >=total_amount:
             entries = [
@@ -139,20 +155,21 @@ def create_sale():
             {"account_id": 5000, "transaction_type": "Debit", "amount": cogs_total},
             {"account_id": 1200, "transaction_type": "Credit", "amount": cogs_total},
         ]
-    txn_id, txn_str = generate_transaction_number_partone('INV', transaction_date=sale_date)
+    txn_id, txn_str = generate_transaction_number('INV', transaction_date=sale_date)
 
+    # Post ledger entries (validated and inserted in one statement, committed below)
+    try:
+        post_to_ledger(
+            entries,
+            transaction_no_id=txn_id,  # pass the correct txn_id
+            description=f"Sale #{sale.id}",
+            transaction_date=sale_date
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
 
-
-
-    # Post ledger entries
-    gl_entries = post_to_ledger(
-        entries,
-        transaction_no_id=txn_id,  # pass the correct txn_id
-        description=f"Sale #{sale.id}",
-        transaction_date=sale_date
-    )
-
-    # Assign the correct transaction_number.id to sale
+    # Link the sale to its GL transaction number
     sale.transaction_no = txn_id
 
     if amount_paid>0:
@@ -169,7 +186,10 @@ def create_sale():
         db.session.add(payment)
         db.session.flush()  # So we can access payment.id before commit
 
+    record_sale_change(None, sale_figures(sale))
     db.session.commit()
+    dashboard_cache.invalidate()
+    debtors_cache.invalidate()
 
     # gl_entries = post_to_ledger(entries, transaction_no_id=txn_id, description=f"Sale #{sale.id}", transaction_date=sale_date)
     # # db.session.flush()  # flush will write txn_id to DB without committing fully
@@ -191,23 +211,67 @@ def create_sale():
 
 
 
+SALES_ORDER = (Sale.sale_date, Sale.id)  # ix_sale_date
+
+
+def sales_list_query():
+    """Sale columns for the list, filtered by ?status= (default: active) and ?from=/?to=, before ordering."""
+    # Column projection only: no ORM objects, no per-sale queries
+    query = db.session.query(
+        Sale.id,
+        Sale.sale_number,
+        Sale.total_amount,
+        Sale.payment_status,
+        Sale.sale_date,
+        Sale.created_at,
+        Sale.updated_at,
+        Sale.balance,
+        Sale.total_paid,
+    )
+    query = filter_status(query, Sale.status, default=[1, 2, 3, 4])  # Only active
+    return filter_date_range(query, Sale.sale_date)
+
+
+def sale_items_query(sale_ids):
+    """Active line items for a set of sales, in one query."""
+    return db.session.query(
+        SaleItem.sale_id,
+        SaleItem.product_id,
+        SaleItem.product_name,
+        SaleItem.quantity,
+        SaleItem.unit_price,
+        SaleItem.total_price,
+    ).filter(SaleItem.sale_id.in_(sale_ids), SaleItem.status == 1).order_by(SaleItem.id)
+
+
 # ------------------ Get All Sales ------------------ #
 @token_required
 @sales_bp.route('/', methods=['GET'])
+@read_replica
 def get_sales():
-    sales = Sale.query.filter(Sale.status.in_([1, 2, 3,4])).all()  # Only active
+    try:
+        sales, next_cursor = paginate(sales_list_query(), *SALES_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Line items are opt-in (?include=items) and fetched for the whole page in one query
+    items_by_sale = None
+    if 'items' in request.args.get('include', '').split(','):
+        items_by_sale = defaultdict(list)
+        sale_ids = [s.id for s in sales]
+        if sale_ids:
+            for i in sale_items_query(sale_ids).all():
+                items_by_sale[i.sale_id].append({
+                    "product_id": i.product_id,
+                    "product_name": i.product_name,
+                    "quantity": i.quantity,
+                    "unit_price": i.unit_price,
+                    "total_price": i.total_price
+                })
+
     data = []
     for s in sales:
-        sale_items = SaleItem.query.filter_by(sale_id=s.id, status=1).all()
-        items = [{
-            "product_id": i.product_id,
-            "product_name": i.product_name,
-            "quantity": i.quantity,
-            "unit_price": i.unit_price,
-            "total_price": i.total_price
-        } for i in sale_items]
-
-        data.append({
+        row = {
             "sale_id": s.id,
             "sale_number": s.sale_number,
             "total_amount": s.total_amount,
@@ -215,11 +279,13 @@ def get_sales():
             "sale_date": s.sale_date,
             "created_at": s.created_at,
             "updated_at": s.updated_at,
-            "items": items,
             "balance":s.balance,
             "total_paid":s.total_paid,
-        })
-    return jsonify(data)
+        }
+        if items_by_sale is not None:
+            row["items"] = items_by_sale.get(s.id, [])
+        data.append(row)
+    return jsonify(page_body(data, next_cursor))
 
 
 # ------------------ Get Single Sale ------------------ #
@@ -256,21 +322,32 @@ def update_sale(sale_id):
     sale = Sale.query.get_or_404(sale_id)
     data = request.json
     new_items = data.get('items')
+    before = sale_figures(sale)
 
-    # Reverse old GL entries
-    if sale.transaction_no:
-        original_entries = GeneralLedger.query.filter_by(transaction_no=sale.transaction_no).all()
-        for entry in original_entries:
-            reverse_type = 'Credit' if entry.transaction_type == 'Debit' else 'Debit'
-            reverse_entry = GeneralLedger(
-                account_id=entry.account_id,
-                transaction_type=reverse_type,
-                amount=entry.amount,
-                description=f"Reversal of {entry.description} before update",
-                transaction_date=datetime.utcnow(),
-                transaction_no=entry.transaction_no
-            )
-            db.session.add(reverse_entry)
+    if new_items:
+        if sale.status == 0:
+            return jsonify({"error": "Cannot change the items of a deleted sale"}), 400
+        try:
+            requested = sum_quantities(new_items)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if any(qty <= 0 for qty in requested.values()):
+            return jsonify({"error": "Item quantities must be greater than zero"}), 400
+
+        # Lock old and new products together (id order) and check the net change up front:
+        # the old lines go back into stock and the new ones come out
+        active_items = [item for item in sale.items if item.status == 1]
+        previous = sum_quantities([{"product_id": i.product_id, "quantity": i.quantity} for i in active_items])
+        products = lock_products(set(previous) | set(requested))
+        deltas = {pid: previous.get(pid, 0) - requested.get(pid, 0) for pid in set(previous) | set(requested)}
+        for product_id in requested:
+            product = products.get(product_id)
+            if not product:
+                db.session.rollback()
+                return jsonify({"error": f"Product {product_id} not found"}), 404
+            if (product.quantity or 0) + deltas[product_id] < 0:
+                db.session.rollback()
+                return jsonify({"error": f"Insufficient stock for {product.name}"}), 400
 
     # Update Sale main fields
     sale.sale_number = data.get('sale_number', sale.sale_number)
@@ -279,33 +356,42 @@ def update_sale(sale_id):
 
     # Update sale items
     if new_items:
-        # Restore stock from old items
-        for item in sale.saleitem_set:
-            product = Product.query.get(item.product_id)
-            if product:
-                product.quantity += item.quantity
-                db.session.add(product)
+        # The invoice is re-posted below; the payment taken with it stays part of it
+        initial_payment = None
+        if sale.transaction_no:
+            initial_payment = Payment.query.filter_by(
+                sale_id=sale.id, transaction_no=sale.transaction_no, status=1
+            ).first()
+            reverse_transaction(sale.transaction_no, "Reversal of {} before update")
+
+        # Net stock change for all lines in one UPDATE (rows are already locked),
+        # moved in or out of inventory value at average cost like create and delete
+        apply_stock_deltas(deltas)
+        adjust_inventory_value(deltas)
+        for item in sale.items:
             db.session.delete(item)
 
         # Add new items
         total_amount = 0
+        cogs_total = 0
+        costs = product_costs(requested)
+        cost_method = current_app.config.get('COGS_COST_METHOD', 'last')
         for item in new_items:
-            product = Product.query.get(item['product_id'])
-            if not product:
-                return jsonify({"error": f"Product {item['product_id']} not found"}), 404
-            if product.quantity < item['quantity']:
-                return jsonify({"error": f"Insufficient stock for {product.name}"}), 400
+            product = products[int(item['product_id'])]
+            quantity = parse_quantity(item['quantity'])
 
-            product.quantity -= item['quantity']
-            db.session.add(product)
+            purchase_price = unit_cost(costs.get(product.id), cost_method)
+            if purchase_price is None:
+                purchase_price = item.get('purchase_price', 0)
+            cogs_total += purchase_price * quantity
 
             sale_item = SaleItem(
                 sale_id=sale.id,
                 product_id=product.id,
                 product_name=product.name,
-                quantity=item['quantity'],
+                quantity=quantity,
                 unit_price=product.price,
-                total_price=product.price * item['quantity'],
+                total_price=product.price * quantity,
                 status=1
             )
             update_timestamps(sale_item)
@@ -313,17 +399,42 @@ def update_sale(sale_id):
             db.session.add(sale_item)
 
         sale.total_amount = total_amount
-
-        # Post new GL entries
-        txn_id, txn_no_str = generate_transaction_number('SAL')
-        entries = [
-            {"account_id": 1, "transaction_type": "Debit", "amount": total_amount},   # Cash/Bank
-            {"account_id": 2, "transaction_type": "Credit", "amount": total_amount}  # Sales Revenue
+        total_paid = sale.total_paid or 0
+        sale.balance = max(total_amount - total_paid, 0)
+        sale.status = 3 if total_paid == 0 else 4 if total_paid < total_amount else 1
+
+        # Post new GL entries: as create_sale, with revenue and COGS for the new lines
+        entries = []
+        amount_paid = initial_payment.amount if initial_payment else 0
+        if amount_paid:
+            payment_account = chart_of_accounts.get(initial_payment.payment_account_id)
+            entries.append({"account_id": payment_account.code, "transaction_type": "Debit", "amount": amount_paid})
+        receivable = total_amount - amount_paid
+        if receivable:
+            entries.append({"account_id": 1100, "transaction_type": "Debit" if receivable > 0 else "Credit",
+                            "amount": abs(receivable)})
+        entries += [
+            {"account_id": 4000, "transaction_type": "Credit", "amount": total_amount},
+            {"account_id": 5000, "transaction_type": "Debit", "amount": cogs_total},
+            {"account_id": 1200, "transaction_type": "Credit", "amount": cogs_total},
         ]
-        gl_entries = post_to_ledger(entries, txn_id, description=f"Sale #{sale.id} updated")
+        txn_id, txn_no_str = generate_transaction_number('INV', transaction_date=sale.sale_date)
+        try:
+            post_to_ledger(entries, txn_id, description=f"Sale #{sale.id} updated", transaction_date=sale.sale_date)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
         sale.transaction_no = txn_id
+        if initial_payment:
+            initial_payment.transaction_no = txn_id  # so the next edit finds it again
+
+    db.session.flush()
+    db.session.expire(sale, ['items'])
+    record_sale_change(before, sale_figures(sale))
 
     db.session.commit()
+    dashboard_cache.invalidate()
+    debtors_cache.invalidate()
     return jsonify({"message": "Sale updated with GL entries", "sale_id": sale.id})
 
 
@@ -332,32 +443,28 @@ def update_sale(sale_id):
 @sales_bp.route('/<int:sale_id>', methods=['DELETE'])
 def delete_sale(sale_id):
     sale = Sale.query.get_or_404(sale_id)
+    before = sale_figures(sale)
 
     sale.status = 0
     update_timestamps(sale)
 
-    for item in sale.saleitem_set:
+    # Put active lines back in stock with one locked, set-based update
+    active_items = [item for item in sale.items if item.status == 1]
+    restored = sum_quantities([{"product_id": i.product_id, "quantity": i.quantity} for i in active_items])
+    lock_products(restored)
+    apply_stock_deltas(restored)
+    adjust_inventory_value(restored)
+
+    for item in active_items:
         item.status = 0
         update_timestamps(item)
-        product = Product.query.get(item.product_id)
-        if product:
-            product.quantity += item.quantity
-            db.session.add(product)
 
     # Reverse GL entries
     if sale.transaction_no:
-        original_entries = GeneralLedger.query.filter_by(transaction_no=sale.transaction_no).all()
-        for entry in original_entries:
-            reverse_type = 'Credit' if entry.transaction_type == 'Debit' else 'Debit'
-            reverse_entry = GeneralLedger(
-                account_id=entry.account_id,
-                transaction_type=reverse_type,
-                amount=entry.amount,
-                description=f"Reversal of {entry.description}",
-                transaction_date=datetime.utcnow(),
-                transaction_no=entry.transaction_no
-            )
-            db.session.add(reverse_entry)
+        reverse_transaction(sale.transaction_no, "Reversal of {}")
 
+    record_sale_change(before, sale_figures(sale))
     db.session.commit()
+    dashboard_cache.invalidate()
+    debtors_cache.invalidate()
     return jsonify({"message": "Sale soft deleted and GL reversed", "sale_id": sale_id})
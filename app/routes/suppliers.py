@@ -2,7 +2,12 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Account, Product, Supplier, PurchaseOrder, PurchaseOrderItem, SupplierPayment
 from app.utils.auth import token_required
+from app.utils.replica import read_replica
+from app.utils.account_cache import chart_of_accounts
 from app.utils.gl_utils import post_to_ledger, generate_transaction_number
+from app.utils.filters import filter_date_range, filter_status
+from app.utils.pagination import paginate, page_body
+from app.utils.stock import lock_products, apply_stock_deltas, apply_purchase_costs
 from datetime import datetime
 
 from sqlalchemy.orm import joinedload
@@ -90,12 +95,25 @@ def delete_supplier(id):
 
 # ------------------ Purchase Orders ------------------ #
 
+PURCHASE_ORDERS_ORDER = (PurchaseOrder.purchase_date, PurchaseOrder.id)  # ix_purchase_order_date
+
+
+def purchase_orders_query():
+    """Purchase orders filtered by ?status= (default: open) and ?from=/?to=, before ordering."""
+    query = filter_status(PurchaseOrder.query, PurchaseOrder.status, default=[1, 2, 3])
+    return filter_date_range(query, PurchaseOrder.purchase_date)
+
+
 @token_required
 # Get all purchase orders
 @suppliers_bp.route('/orders', methods=['GET'])
-
+@read_replica
 def get_purchase_orders():
-    orders = PurchaseOrder.query.filter(PurchaseOrder.status.in_([1, 2, 3])).all()
+    try:
+        orders, next_cursor = paginate(purchase_orders_query(), *PURCHASE_ORDERS_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     data = [{
         'id': o.id,
         'supplier_id': o.supplier_id,
@@ -107,7 +125,7 @@ def get_purchase_orders():
         'status': o.status,
         'created_at': o.created_at
     } for o in orders]
-    return jsonify(data), 200
+    return jsonify(page_body(data, next_cursor)), 200
 
 
 @token_required
@@ -202,6 +220,7 @@ def add_purchase_order():
     db.session.flush()  # to get PO id before committing
 
     total_amount = 0
+    changes = {}  # product_id -> [quantity, value, last unit price]
 
     # Add purchase order items
     for item_data in data['items']:
@@ -216,11 +235,16 @@ def add_purchase_order():
         db.session.add(item)
         total_amount += item.total_price
 
-        # Update product stock
-        product = Product.query.get(item.product_id)
-        if product:
-            product.quantity = (product.quantity or 0) + item.quantity
-            db.session.add(product)
+        change = changes.setdefault(int(item.product_id), [0, 0, None])
+        change[0] += item.quantity
+        change[1] += item.total_price
+        change[2] = item.unit_price
+
+    # Update product costs, then stock, for every product in the order
+    products = lock_products(changes)
+    changes = {pid: change for pid, change in changes.items() if pid in products}
+    apply_purchase_costs(changes, products)
+    apply_stock_deltas({pid: change[0] for pid, change in changes.items()})
 
     # Update totals
     po.total_amount = total_amount
@@ -245,14 +269,21 @@ def update_purchase_order(id):
 
     # Update items if provided
     if 'items' in data:
+        changes = {}  # product_id -> [quantity delta, value delta, last unit price]
         for item_data in data['items']:
             if 'id' in item_data:
                 # Update existing item
                 item = PurchaseOrderItem.query.get(item_data['id'])
                 if item and item.purchase_order_id == po.id:
+                    old_quantity, old_total = item.quantity, item.total_price or 0
                     item.quantity = item_data.get('quantity', item.quantity)
                     item.unit_price = item_data.get('unit_price', item.unit_price)
                     item.calculate_total()
+                    if item.status == 1:
+                        change = changes.setdefault(item.product_id, [0, 0, None])
+                        change[0] += item.quantity - old_quantity
+                        change[1] += item.total_price - old_total
+                        change[2] = item.unit_price
             else:
                 # Add new item
                 new_item = PurchaseOrderItem(
@@ -264,6 +295,20 @@ def update_purchase_order(id):
                 )
                 new_item.calculate_total()
                 db.session.add(new_item)
+                change = changes.setdefault(int(new_item.product_id), [0, 0, None])
+                change[0] += new_item.quantity
+                change[1] += new_item.total_price
+                change[2] = new_item.unit_price
+
+        products = lock_products(changes)
+        changes = {pid: change for pid, change in changes.items() if pid in products}
+        # Reducing a received quantity cannot take back stock that has already been sold
+        for pid, change in changes.items():
+            if (products[pid].quantity or 0) + change[0] < 0:
+                db.session.rollback()
+                return jsonify({"error": f"Insufficient stock for {products[pid].name}"}), 400
+        apply_purchase_costs(changes, products)
+        apply_stock_deltas({pid: change[0] for pid, change in changes.items()})
 
     # Recalculate totals
     po.update_totals()
@@ -311,7 +356,7 @@ def pay_purchase_order(id):
         return jsonify({'error': 'Payment account is required'}), 400
 
     # Validate payment account exists
-    payment_account = Account.query.get(payment_account_id)
+    payment_account = chart_of_accounts.get(payment_account_id)
     if not payment_account:
         return jsonify({'error': 'Invalid payment account selected'}), 400
 
@@ -357,12 +402,16 @@ def pay_purchase_order(id):
         }
     ]
 
-    post_to_ledger(
-        entries,
-        transaction_no_id=txn_id,
-        description=f"Payment for PO #{po.id}",
-        transaction_date=transaction_date
-    )
+    try:
+        post_to_ledger(
+            entries,
+            transaction_no_id=txn_id,
+            description=f"Payment for PO #{po.id}",
+            transaction_date=transaction_date
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
 
     # Final commit
     db.session.commit()
@@ -435,7 +484,7 @@ def get_purchase_order_details(purchase_order_id):
             "payment_type": p.payment_type,
             "payment_date": p.payment_date.strftime("%Y-%m-%d"),
             "reference": p.reference,
-            "account_id":  Account.query.get(p.payment_account_id).name if p.payment_account_id else None,
+            "account_id": getattr(chart_of_accounts.get(p.payment_account_id), 'name', None),
         }
         for p in payments
     ]
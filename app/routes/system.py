@@ -0,0 +1,34 @@
+import os
+
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.utils.auth import permission_required
+from app.utils.pool_metrics import pool_status
+
+system_bp = Blueprint('system', __name__, url_prefix='/system')
+
+VIEW_SYSTEM = 'view_system'  # admins hold it implicitly; grant it to let others see server internals
+
+
+# --- Connection pool metrics (this worker process) ---
+@system_bp.route('/pool', methods=['GET'])
+@permission_required(VIEW_SYSTEM)
+def pool_metrics():
+    binds = {}
+    for key, engine in db.engines.items():
+        status = pool_status(engine)
+        try:
+            with engine.connect() as conn:
+                server = conn.execute(text(
+                    "SELECT current_setting('max_connections')::int AS max_connections, "
+                    "(SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()) AS connections"
+                )).one()
+            status["server"] = {"max_connections": server.max_connections, "connections": server.connections}
+        except SQLAlchemyError as e:
+            status["server"] = {"error": e.__class__.__name__}
+        binds[key or 'primary'] = status
+
+    return jsonify({"pid": os.getpid(), "binds": binds})
@@ -5,12 +5,15 @@ from werkzeug.security import generate_password_hash, check_password_hash
 # from datetime import datetime
 import jwt
 from datetime import datetime, timedelta
-from app.utils.auth import token_required
+from app.utils.auth import permission_required, token_required
+from app.utils.permissions import permission_cache
 
 # from flask import current_app
 
 users_bp = Blueprint('users', __name__, url_prefix='/users')
 
+MANAGE_USERS = 'manage_users'  # every route here except login
+
 # ---------------- User Routes ---------------- #
 
 
@@ -36,6 +39,7 @@ def login():
         "user_id": user.id,
         "username": user.username,
         "role": user.role,
+        "pv": user.permissions_version,  # lets the permission cache spot newer grants
         "exp": datetime.utcnow() + timedelta(hours=2)  # token expires in 2 hours
     }
 
@@ -56,6 +60,7 @@ def login():
 
 # Create a new user
 @users_bp.route('/', methods=['POST'])
+@permission_required(MANAGE_USERS)
 def create_user():
     data = request.json
     username = data.get('username')
@@ -83,6 +88,7 @@ def create_user():
 
 # Get all users
 @users_bp.route('/', methods=['GET'])
+@permission_required(MANAGE_USERS)
 def get_users():
     users = User.query.all()
     data = []
@@ -100,6 +106,7 @@ def get_users():
 
 # Get a user by ID
 @users_bp.route('/<int:user_id>', methods=['GET'])
+@permission_required(MANAGE_USERS)
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
     return jsonify({
@@ -114,31 +121,38 @@ def get_user(user_id):
 
 # Update a user
 @users_bp.route('/<int:user_id>', methods=['PUT'])
+@permission_required(MANAGE_USERS)
 def update_user(user_id):
     user = User.query.get_or_404(user_id)
     data = request.json
 
     user.username = data.get('username', user.username)
-    user.role = data.get('role', user.role)
+    if data.get('role', user.role) != user.role:
+        user.role = data['role']
+        user.bump_permissions_version()
     if 'password' in data and data['password']:
         user.set_password(data['password'])
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    permission_cache.invalidate_user(user.id)
 
     return jsonify({"message": "User updated", "user_id": user.id})
 
 # Delete a user
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
+@permission_required(MANAGE_USERS)
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    permission_cache.invalidate_user(user_id)
     return jsonify({"message": "User deleted", "user_id": user.id})
 
 # ---------------- Permission Routes ---------------- #
 
 # Create a permission
 @users_bp.route('/permissions', methods=['POST'])
+@permission_required(MANAGE_USERS)
 def create_permission():
     data = request.json
     name = data.get('name')
@@ -156,11 +170,13 @@ def create_permission():
     )
     db.session.add(perm)
     db.session.commit()
+    permission_cache.invalidate()
 
     return jsonify({"message": "Permission created", "permission_id": perm.id}), 201
 
 
 @users_bp.route('/permissions', methods=['GET'])
+@permission_required(MANAGE_USERS)
 def get_permissions():
     permissions = Permission.query.all()
 
@@ -178,20 +194,24 @@ def get_permissions():
 
 # Assign permission to user
 @users_bp.route('/<int:user_id>/permissions/<int:perm_id>', methods=['POST'])
+@permission_required(MANAGE_USERS)
 def assign_permission(user_id, perm_id):
     user = User.query.get_or_404(user_id)
     perm = Permission.query.get_or_404(perm_id)
     user.add_permission(perm)
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    permission_cache.invalidate_user(user.id)
     return jsonify({"message": f"Permission '{perm.name}' assigned to user '{user.username}'"})
 
 # Remove permission from user
 @users_bp.route('/<int:user_id>/permissions/<int:perm_id>', methods=['DELETE'])
+@permission_required(MANAGE_USERS)
 def remove_permission(user_id, perm_id):
     user = User.query.get_or_404(user_id)
     perm = Permission.query.get_or_404(perm_id)
     user.remove_permission(perm)
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    permission_cache.invalidate_user(user.id)
     return jsonify({"message": f"Permission '{perm.name}' removed from user '{user.username}'"})
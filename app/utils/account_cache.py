@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from app import db
+from app.models import Account
+
+
+AccountRef = namedtuple('AccountRef', ['id', 'code', 'name', 'account_type', 'status'])
+
+
+class ChartOfAccounts:
+    """
+    Process-wide, in-memory code <-> id <-> type resolver for the account table.
+
+    Loaded once (at startup or on first use) and dropped by the accounts_bp
+    write endpoints. A TTL (ACCOUNT_CACHE_TTL seconds) bounds how long another
+    worker process can keep serving a stale copy.
+
+    Readers work on an immutable (by_id, by_code, loaded_at) snapshot that
+    load() and invalidate() swap in one assignment, so a lookup never sees a
+    half-cleared cache. A miss reloads at most once per
+    ACCOUNT_CACHE_MISS_INTERVAL seconds, so repeated unknown ids or codes
+    don't each re-read the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None  # (by_id, by_code, loaded_at)
+
+    def load(self):
+        rows = db.session.query(
+            Account.id, Account.code, Account.name, Account.account_type, Account.status
+        ).all()
+        refs = [AccountRef(r.id, str(r.code), r.name, r.account_type, r.status) for r in rows]
+        snapshot = ({a.id: a for a in refs}, {a.code: a for a in refs}, time.monotonic())
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _ensure_loaded(self):
+        snapshot = self._snapshot
+        ttl = current_app.config.get('ACCOUNT_CACHE_TTL', 300)
+        if snapshot is None or time.monotonic() - snapshot[2] > ttl:
+            snapshot = self.load()
+        return snapshot
+
+    def _lookup(self, index, key):
+        snapshot = self._ensure_loaded()
+        account = snapshot[index].get(key)
+        if account is None:
+            # May have been added by another worker since we loaded
+            interval = current_app.config.get('ACCOUNT_CACHE_MISS_INTERVAL', 5)
+            if time.monotonic() - snapshot[2] > interval:
+                account = self.load()[index].get(key)
+        return account
+
+    def get(self, account_id):
+        """Return the AccountRef for a primary key, or None."""
+        if account_id is None:
+            return None
+        try:
+            account_id = int(account_id)
+        except (TypeError, ValueError):
+            return None
+        return self._lookup(0, account_id)
+
+    def by_code(self, code):
+        """Return the AccountRef for an account code, or None."""
+        if code is None:
+            return None
+        return self._lookup(1, str(code))
+
+    def id_for_code(self, code):
+        account = self.by_code(code)
+        if not account:
+            raise ValueError(f"Account with code {code} not found.")
+        return account.id
+
+    def code_for_id(self, account_id):
+        account = self.get(account_id)
+        if not account:
+            raise ValueError(f"Account with id {account_id} not found.")
+        return account.code
+
+    def accounts(self):
+        return list(self._ensure_loaded()[0].values())
+
+
+chart_of_accounts = ChartOfAccounts()
@@ -2,20 +2,52 @@ from flask import request, jsonify, current_app
 import jwt
 from functools import wraps
 
+
+def _decode_token():
+    """Return (claims, None) for a valid bearer token, else (None, error response)."""
+    token = request.headers.get("Authorization")
+    if not token:
+        return None, (jsonify({"error": "Token is missing"}), 401)
+    try:
+        token = token.split(" ")[1]  # "Bearer <token>"
+        return jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"]), None
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({"error": "Token expired"}), 401)
+    except (jwt.InvalidTokenError, IndexError):
+        return None, (jsonify({"error": "Invalid token"}), 401)
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get("Authorization")
-        if not token:
-            return jsonify({"error": "Token is missing"}), 401
-        try:
-            token = token.split(" ")[1]  # "Bearer <token>"
-            data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
+        data, error = _decode_token()
+        if error:
+            return error
 
         request.user = data
         return f(*args, **kwargs)
     return decorated
+
+
+def permission_required(name):
+    """
+    Require a valid token whose user holds permission `name` (admins hold
+    every permission). Checked against the in-process permission cache, so
+    no query is made once the user's grants are cached. Goes below the
+    route decorator.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            from app.utils.permissions import permission_cache
+
+            data, error = _decode_token()
+            if error:
+                return error
+            if not permission_cache.allows(data.get("user_id"), name, data.get("pv")):
+                return jsonify({"error": f"Permission '{name}' required"}), 403
+
+            request.user = data
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
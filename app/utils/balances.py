@@ -0,0 +1,99 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import case, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import db
+from app.models import AccountBalance, GeneralLedger
+
+
+DEBIT_NORMAL_TYPES = ('Asset', 'Expense')
+
+
+def normal_sign(account_type):
+    """+1 when an account's balance is debit minus credit, -1 when it is credit minus debit."""
+    return 1 if account_type in DEBIT_NORMAL_TYPES else -1
+
+
+def _ledger_deltas(rows):
+    """Sum (debit, credit) per account for an iterable of GL row dicts."""
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    for r in rows:
+        side = 0 if r['transaction_type'] == 'Debit' else 1
+        deltas[r['account_id']][side] += float(r['amount'] or 0)
+    return deltas
+
+
+def apply_balance_deltas(rows, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) GL rows from account_balance in one
+    upsert. Runs in the caller's transaction, so it commits or rolls back
+    together with the GL insert it mirrors.
+    """
+    deltas = _ledger_deltas(rows)
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    values = [{
+        "account_id": account_id,
+        "debit_total": sign * debit,
+        "credit_total": sign * credit,
+        "updated_at": now,
+    } for account_id, (debit, credit) in sorted(deltas.items())]  # id order avoids deadlocks
+
+    stmt = pg_insert(AccountBalance).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AccountBalance.account_id],
+        set_={
+            "debit_total": AccountBalance.debit_total + stmt.excluded.debit_total,
+            "credit_total": AccountBalance.credit_total + stmt.excluded.credit_total,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    db.session.execute(stmt)
+
+
+def ledger_totals_query():
+    """Per-account debit/credit totals straight from general_ledger."""
+    return db.session.query(
+        GeneralLedger.account_id,
+        func.coalesce(func.sum(case((GeneralLedger.transaction_type == 'Debit', GeneralLedger.amount), else_=0)), 0).label('debit_total'),
+        func.coalesce(func.sum(case((GeneralLedger.transaction_type == 'Credit', GeneralLedger.amount), else_=0)), 0).label('credit_total'),
+    ).filter(GeneralLedger.status != 9).group_by(GeneralLedger.account_id)
+
+
+def rebuild_account_balances():
+    """Recompute account_balance from the GL. Caller commits."""
+    now = datetime.utcnow()
+    # Hold off concurrent postings' upserts until the rebuild commits
+    db.session.execute(text("LOCK TABLE account_balance IN SHARE ROW EXCLUSIVE MODE"))
+    db.session.query(AccountBalance).delete(synchronize_session=False)
+    rows = [{
+        "account_id": r.account_id,
+        "debit_total": float(r.debit_total),
+        "credit_total": float(r.credit_total),
+        "updated_at": now,
+    } for r in ledger_totals_query().all()]
+    if rows:
+        db.session.execute(pg_insert(AccountBalance).values(rows))
+    return len(rows)
+
+
+def check_account_balances(tolerance=0.005):
+    """Return accounts whose stored balance differs from the GL."""
+    ledger = {r.account_id: (float(r.debit_total), float(r.credit_total)) for r in ledger_totals_query().all()}
+    stored = {b.account_id: (b.debit_total, b.credit_total) for b in AccountBalance.query.all()}
+
+    mismatches = []
+    for account_id in sorted(set(ledger) | set(stored)):
+        expected = ledger.get(account_id, (0.0, 0.0))
+        actual = stored.get(account_id, (0.0, 0.0))
+        if abs(expected[0] - actual[0]) > tolerance or abs(expected[1] - actual[1]) > tolerance:
+            mismatches.append({
+                "account_id": account_id,
+                "ledger_debit": expected[0], "ledger_credit": expected[1],
+                "stored_debit": actual[0], "stored_credit": actual[1],
+            })
+    return mismatches
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import select, text
+
+from app import db
+from app.models import dashboard_cache_version_seq, debtors_cache_version_seq
+from app.utils.replica import reads_from_primary
+
+
+class SnapshotCache:
+    """
+    Small per-process TTL cache for computed read models (dashboard, reports).
+
+    Values are recomputed at most once per TTL per key: concurrent readers of
+    an expired key wait for the one computing it instead of all hitting the
+    database. Write paths call invalidate() after they commit.
+
+    Entries are stamped with this process's generation, which invalidate()
+    bumps, so a computation that was running during an invalidation is not
+    stored. With a version_sequence the stamp also carries that sequence's
+    value, and invalidate() advances it, so other worker processes drop
+    their copy within CACHE_VERSION_CHECK_INTERVAL seconds instead of
+    waiting out the TTL; the sequence is read at most that often per
+    process, so cache hits cost no query in between. At most max_entries
+    keys are kept, least recently used first out.
+
+    For REPLICA_MAX_LAG + REPLICA_LAG_CHECK_INTERVAL seconds after this
+    process sees an invalidation, values are computed from the primary: a
+    replica may not have replayed the write yet, and its data would be
+    stored under the new version.
+    """
+
+    def __init__(self, config_key, default_ttl=30, version_sequence=None, max_entries=128):
+        self.config_key = config_key
+        self.default_ttl = default_ttl
+        self.version_sequence = version_sequence
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._version = None  # (checked_at, shared version)
+        self._changed_at = None  # when this process last saw an invalidation
+        self._key_locks = {}  # only keys being computed
+        self._entries = OrderedDict()  # key -> (stored_at, stamp, value)
+
+    def _ttl(self):
+        return current_app.config.get(self.config_key, self.default_ttl)
+
+    def _shared_version(self):
+        if self.version_sequence is None:
+            return None
+        interval = current_app.config.get('CACHE_VERSION_CHECK_INTERVAL', 2)
+        with self._lock:
+            checked = self._version
+        if checked and time.monotonic() - checked[0] <= interval:
+            return checked[1]
+
+        # Sequences are not transactional: last_value is the latest nextval() of any session.
+        # Read on the primary, a replica may not have seen the bump yet.
+        row = db.session.execute(
+            text(f'SELECT last_value, is_called FROM "{self.version_sequence.name}"'),
+            bind_arguments={'bind': db.engine}
+        ).one()
+        version = row.last_value if row.is_called else 0
+        with self._lock:
+            if self._version is None or self._version[1] != version:
+                self._changed_at = time.monotonic()  # when the bump happened is unknown
+            self._version = (time.monotonic(), version)
+        return version
+
+    def _replica_may_lag(self):
+        """True while a healthy replica may still be missing the writes behind the last invalidation seen."""
+        with self._lock:
+            changed_at = self._changed_at
+        if changed_at is None:
+            return False
+        window = current_app.config.get('REPLICA_MAX_LAG', 30) + current_app.config.get('REPLICA_LAG_CHECK_INTERVAL', 5)
+        return time.monotonic() - changed_at <= window
+
+    def _stamp(self):
+        with self._lock:
+            generation = self._generation
+        return generation, self._shared_version()
+
+    def _fresh(self, key, stamp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] == stamp and time.monotonic() - entry[0] <= self._ttl():
+                self._entries.move_to_end(key)
+                return entry
+        return None
+
+    def get_or_compute(self, key, compute):
+        stamp = self._stamp()
+        entry = self._fresh(key, stamp)
+        if entry:
+            return entry[2]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._fresh(key, stamp)  # computed while we waited
+            if entry:
+                return entry[2]
+            try:
+                if self._replica_may_lag():
+                    with reads_from_primary():
+                        value = compute()
+                else:
+                    value = compute()
+            except Exception:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+                raise
+            with self._lock:
+                self._key_locks.pop(key, None)
+                if self._generation == stamp[0]:  # not invalidated while computing
+                    self._entries[key] = (time.monotonic(), stamp, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return value
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._changed_at = time.monotonic()
+            self._entries.clear()
+        if self.version_sequence is not None:
+            version = db.session.execute(
+                select(self.version_sequence.next_value()), bind_arguments={'bind': db.engine}
+            ).scalar()
+            with self._lock:
+                self._version = (time.monotonic(), version)
+
+
+dashboard_cache = SnapshotCache('DASHBOARD_CACHE_TTL', default_ttl=30, version_sequence=dashboard_cache_version_seq)
+debtors_cache = SnapshotCache('DEBTORS_CACHE_TTL', default_ttl=300, version_sequence=debtors_cache_version_seq)
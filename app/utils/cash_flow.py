@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select
+
+from app import db
+from app.models import GeneralLedger
+from app.utils.account_cache import chart_of_accounts
+from app.utils.periods import balances_as_of
+
+
+CASH_CODE_RANGE = (1000, 1080)        # cash on hand, petty cash, mobile money and bank accounts
+INVESTING_CODES = {'1400'}            # fixed assets
+FINANCING_CODES = {'2400', '3000', '3200'}  # loans, owner's equity, drawings
+
+
+def cash_account_ids():
+    low, high = CASH_CODE_RANGE
+    return [a.id for a in chart_of_accounts.accounts() if a.code.isdigit() and low <= int(a.code) <= high]
+
+
+def section_for(account):
+    if account is None:
+        return 'operating'
+    if account.code in INVESTING_CODES:
+        return 'investing'
+    if account.code in FINANCING_CODES:
+        return 'financing'
+    return 'operating'
+
+
+def _allocate(cash_net, contra):
+    """
+    Split one transaction's net cash movement over its contra rows.
+
+    contra is a list of (account_id, signed amount; debit positive). Rows on
+    the same side as the cash movement belong to non-cash pairs (e.g. COGS
+    against inventory inside a sale): each is cancelled against an
+    opposite-side row of the same amount on another account. A row is never
+    cancelled against its own account, since that is a reversal and not a
+    non-cash pair. The cash is then spread over the remaining opposite-side
+    rows in proportion to their amounts.
+    """
+    inflow = cash_net > 0
+    opposite = [[account_id, abs(amount)] for account_id, amount in contra if (amount < 0) == inflow and amount]
+    same = [(account_id, abs(amount)) for account_id, amount in contra if (amount < 0) != inflow and amount]
+
+    for same_account_id, amount in same:
+        for row in opposite:
+            if row[1] and row[0] != same_account_id and abs(row[1] - amount) < 0.005:
+                row[1] = 0
+                break
+
+    total = sum(amount for _, amount in opposite)
+    if not total:
+        return [(None, cash_net)]
+    return [(account_id, cash_net * amount / total) for account_id, amount in opposite if amount]
+
+
+def cash_flow_statement(start=None, end=None):
+    """
+    Direct-method cash flow for [start, end] (dates, inclusive, optional).
+
+    Every GL transaction that moves a cash account is read in one pass: the
+    cash accounts' rows locate the transactions through the
+    (account_id, transaction_date) index, their rows are fetched through
+    the transaction_no index, and a window over transaction_no gives each
+    row its transaction's net cash movement. That movement is
+    classified by contra account. A transaction whose rows are all on cash
+    accounts is a transfer between them and is reported separately. One
+    that nets to zero cash but has contra rows (a posting and its reversal
+    under the same transaction number) is reported as offsetting inflow and
+    outflow lines on its contra accounts.
+    """
+    cash_ids = cash_account_ids()
+    range_filters = [GeneralLedger.status != 9]
+    if start:
+        range_filters.append(GeneralLedger.transaction_date >= datetime.combine(start, datetime.min.time()))
+    if end:
+        range_filters.append(GeneralLedger.transaction_date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+    is_cash = GeneralLedger.account_id.in_(cash_ids)
+    signed = case((GeneralLedger.transaction_type == 'Debit', GeneralLedger.amount), else_=-GeneralLedger.amount)
+    cash_transactions = select(GeneralLedger.transaction_no).where(is_cash, *range_filters)
+
+    rows = db.session.query(
+        GeneralLedger.transaction_no,
+        GeneralLedger.account_id,
+        signed.label('signed'),
+        is_cash.label('is_cash'),
+        func.sum(case((is_cash, signed), else_=0)).over(partition_by=GeneralLedger.transaction_no).label('cash_net'),
+    ).filter(GeneralLedger.transaction_no.in_(cash_transactions), *range_filters).all()
+
+    # Manual cash entries carry no transaction number, so there is no contra to classify by
+    manual = db.session.query(signed.label('signed')).filter(
+        is_cash, GeneralLedger.transaction_no.is_(None), *range_filters
+    ).all()
+
+    transactions = defaultdict(lambda: {'cash_net': 0.0, 'gross': 0.0, 'contra': []})
+    lines = defaultdict(lambda: [0.0, 0.0])  # account_id -> [inflow, outflow]
+    transfers = 0.0
+
+    for r in manual:
+        lines[None][0 if r.signed > 0 else 1] += abs(float(r.signed))
+
+    for r in rows:
+        amount = float(r.signed)
+        txn = transactions[r.transaction_no]
+        txn['cash_net'] = float(r.cash_net)
+        if r.is_cash:
+            txn['gross'] += max(amount, 0)
+        else:
+            txn['contra'].append((r.account_id, amount))
+
+    for txn in transactions.values():
+        cash_net = round(txn['cash_net'], 2)
+        if cash_net:
+            movements = [cash_net]
+        elif not any(amount for _, amount in txn['contra']):
+            transfers += txn['gross']
+            continue
+        else:
+            # Cash went in and back out again against the same contra accounts
+            gross = round(txn['gross'], 2)
+            movements = [gross, -gross] if gross else []
+        for movement in movements:
+            for account_id, amount in _allocate(movement, txn['contra']):
+                lines[account_id][0 if amount > 0 else 1] += abs(amount)
+
+    sections = {name: {"lines": [], "inflow": 0.0, "outflow": 0.0, "net": 0.0}
+                for name in ('operating', 'investing', 'financing')}
+    def by_code(item):
+        account = chart_of_accounts.get(item[0])
+        return account.code if account else '~'  # unallocated last
+
+    for account_id, (inflow, outflow) in sorted(lines.items(), key=by_code):
+        account = chart_of_accounts.get(account_id)
+        section = sections[section_for(account)]
+        section["lines"].append({
+            "account_id": account_id,
+            "account_code": account.code if account else None,
+            "account_name": account.name if account else "Unallocated",
+            "inflow": round(inflow, 2),
+            "outflow": round(outflow, 2),
+            "net": round(inflow - outflow, 2)
+        })
+        section["inflow"] += inflow
+        section["outflow"] += outflow
+    for section in sections.values():
+        section["net"] = round(section["inflow"] - section["outflow"], 2)
+        section["inflow"] = round(section["inflow"], 2)
+        section["outflow"] = round(section["outflow"], 2)
+
+    total_in = sum(s["inflow"] for s in sections.values())
+    total_out = sum(s["outflow"] for s in sections.values())
+
+    opening = None
+    if start:
+        opening_totals = balances_as_of(start - timedelta(days=1), cash_ids)
+        opening = round(sum(d - c for d, c in opening_totals.values()), 2)
+    closing_totals = balances_as_of(end or datetime.utcnow().date(), cash_ids)
+    closing = round(sum(d - c for d, c in closing_totals.values()), 2)
+
+    return {
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "opening_cash": opening,
+        "closing_cash": closing,
+        "cash_inflow": round(total_in, 2),
+        "cash_outflow": round(total_out, 2),
+        "net_cash_flow": round(total_in - total_out, 2),
+        "internal_transfers": round(transfers, 2),
+        "sections": sections
+    }
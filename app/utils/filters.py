@@ -0,0 +1,108 @@
+from datetime import date, datetime, timedelta
+
+from flask import request
+
+
+def date_arg(name):
+    """Parse a YYYY-MM-DD query parameter; None when absent."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid '{name}' date. Use YYYY-MM-DD")
+
+
+def add_months(day, months):
+    """First day of the month `months` after (or, when negative, before) day's month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_bounds(period, today=None):
+    """
+    (start, end) dates, both inclusive, for a named or calendar period:
+    today, yesterday, last_7_days, last_30_days, this_month, last_month,
+    this_quarter, last_quarter, this_year, last_year, YYYY, YYYY-MM or YYYY-Qn.
+    """
+    today = today or datetime.utcnow().date()
+    quarter_start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    named = {
+        'today': (today, today),
+        'yesterday': (today - timedelta(days=1), today - timedelta(days=1)),
+        'last_7_days': (today - timedelta(days=6), today),
+        'last_30_days': (today - timedelta(days=29), today),
+        'this_month': (add_months(today, 0), today),
+        'last_month': (add_months(today, -1), add_months(today, 0) - timedelta(days=1)),
+        'this_quarter': (quarter_start, today),
+        'last_quarter': (add_months(quarter_start, -3), quarter_start - timedelta(days=1)),
+        'this_year': (date(today.year, 1, 1), today),
+        'last_year': (date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)),
+    }
+    if period in named:
+        return named[period]
+
+    try:
+        if len(period) == 4:
+            year = int(period)
+            return date(year, 1, 1), date(year, 12, 31)
+        if len(period) == 7 and period[4] == '-' and period[5] in 'Qq':
+            start = date(int(period[:4]), 3 * (int(period[6]) - 1) + 1, 1)
+            return start, add_months(start, 3) - timedelta(days=1)
+        if len(period) == 7 and period[4] == '-':
+            start = date(int(period[:4]), int(period[5:]), 1)
+            return start, add_months(start, 1) - timedelta(days=1)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid 'period' {period!r}. Use e.g. this_month, last_quarter, 2025, 2025-03 or 2025-Q1")
+
+
+def date_range():
+    """
+    (from, to) dates, both inclusive and optional, from ?period= and/or
+    ?from=&to=; explicit from/to override the matching end of the period.
+    """
+    start = end = None
+    period = request.args.get('period')
+    if period:
+        start, end = period_bounds(period)
+    start = date_arg('from') or start
+    end = date_arg('to') or end
+    if start and end and start > end:
+        raise ValueError("'from' must be on or before 'to'")
+    return start, end
+
+
+def range_bounds():
+    """date_range() as half-open datetimes [start, end) for DateTime columns."""
+    start, end = date_range()
+    return (
+        datetime.combine(start, datetime.min.time()) if start else None,
+        datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None,
+    )
+
+
+def filter_date_range(query, column):
+    """Restrict query to ?period= / ?from=&to= on a DateTime column (whole days, index friendly)."""
+    start, end = range_bounds()
+    if start:
+        query = query.filter(column >= start)
+    if end:
+        query = query.filter(column < end)
+    return query
+
+
+def filter_status(query, column, default=None):
+    """Restrict query to ?status=1,2 or, when absent, to the default statuses."""
+    value = request.args.get('status')
+    if value:
+        try:
+            statuses = [int(s) for s in value.split(',') if s.strip()]
+        except ValueError:
+            raise ValueError("Invalid 'status'. Use comma-separated integers")
+    else:
+        statuses = default
+    if statuses:
+        query = query.filter(column.in_(statuses))
+    return query
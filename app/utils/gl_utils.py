@@ -1,121 +1,185 @@
 from app import db
-from app.models import GeneralLedger, TransactionNumber, Account
+from app.models import GeneralLedger, transaction_document_seq
+from app.utils.account_cache import chart_of_accounts
+from app.utils.balances import apply_balance_deltas
+from app.utils.periods import ensure_period_open
+import os
+import threading
 from datetime import datetime
-from sqlalchemy import cast, Integer
+from sqlalchemy import insert, select, text
+
+
+class UnbalancedEntriesError(ValueError):
+    """Raised when a ledger posting's debits and credits do not agree."""
+
+
+class LedgerPosting:
+    """
+    Unit of work for a single document's GL entries.
+
+    Entries are collected with add()/extend(), checked for debits == credits,
+    and written with one multi-row INSERT on flush(). The caller owns the
+    transaction and issues the single db.session.commit().
+    """
+
+    def __init__(self, transaction_no_id, description=None, transaction_date=None, status=1):
+        self.transaction_no_id = transaction_no_id
+        self.description = description
+        self.transaction_date = transaction_date or datetime.utcnow()
+        self.status = status
+        self.entries = []
+
+    def add(self, account_code, transaction_type, amount):
+        if transaction_type not in ('Debit', 'Credit'):
+            raise ValueError(f"Invalid transaction type {transaction_type}.")
+        self.entries.append({
+            "account_id": str(account_code),
+            "transaction_type": transaction_type,
+            "amount": float(amount or 0),
+        })
+        return self
+
+    def extend(self, entries):
+        for e in entries:
+            self.add(e['account_id'], e['transaction_type'], e['amount'])
+        return self
+
+    def totals(self):
+        debit = sum(e['amount'] for e in self.entries if e['transaction_type'] == 'Debit')
+        credit = sum(e['amount'] for e in self.entries if e['transaction_type'] == 'Credit')
+        return round(debit, 2), round(credit, 2)
+
+    def validate(self):
+        if not self.entries:
+            raise ValueError("No ledger entries to post.")
+        debit, credit = self.totals()
+        if debit != credit:
+            raise UnbalancedEntriesError(
+                f"Unbalanced ledger posting: debits {debit} != credits {credit}."
+            )
+
+    def _resolve_accounts(self):
+        # Served from the in-process chart of accounts, no query per posting
+        return {code: chart_of_accounts.id_for_code(code) for code in {e['account_id'] for e in self.entries}}
+
+    def flush(self):
+        """Validate and insert all entries in one statement (no commit)."""
+        self.validate()
+        account_lookup = self._resolve_accounts()
+
+        now = datetime.utcnow()
+        rows = [{
+            "account_id": account_lookup[e['account_id']],
+            "transaction_type": e['transaction_type'],
+            "amount": e['amount'],
+            "description": self.description,
+            "transaction_date": self.transaction_date,
+            "transaction_no": self.transaction_no_id,
+            "status": self.status,
+            "created_at": now,
+            "updated_at": now,
+        } for e in self.entries]
+
+        db.session.execute(insert(GeneralLedger), rows)
+        # Checked after the insert so a concurrent period close either sees
+        # this row or blocks it until the close has committed
+        ensure_period_open(self.transaction_date)
+        apply_balance_deltas(rows)
+        return rows
 
 
 def post_to_ledger(entries, transaction_no_id, description=None, transaction_date=None):
-    if transaction_date is None:
-        transaction_date = datetime.utcnow()
-
-    # Convert all account codes to strings
-    account_codes = {str(e['account_id']) for e in entries}
-
-    # Fetch accounts once
-    accounts = (
-        db.session.query(Account.code, Account.id)
-        .filter(cast(Account.code, Integer).in_(account_codes))
-        .all()
-    )
-    account_lookup = {str(code): id for code, id in accounts}
-
-    gl_entries = []
-    for e in entries:
-        code = str(e['account_id'])
-        if code not in account_lookup:
-            raise ValueError(f"Account with code {code} not found.")
-        print(f"Posting to GL: Account Code={code}, Type={e['transaction_type']}, Amount={e['amount']}")
-
-        # Create GL entry and populate StatusMixin fields
-        gl_entry = GeneralLedger(
-            account_id=account_lookup[code],
-            transaction_type=e['transaction_type'],
-            amount=e['amount'],
-            description=description,
-            transaction_date=transaction_date,
-            transaction_no=transaction_no_id,
-            status=1,  # Active
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-
-        db.session.add(gl_entry)
-        gl_entries.append(gl_entry)
-
-    db.session.commit()
-    return gl_entries
-
-
-
-# def generate_transaction_number(prefix, transaction_date=None, status=1):
-#     # ✅ Generate a fresh timestamp each time
-#     if transaction_date is None:
-#         transaction_date = datetime.utcnow()
-
-#     tn = TransactionNumber.query.filter_by(prefix=prefix).first()
-
-#     if not tn:
-#         tn = TransactionNumber(
-#             prefix=prefix,
-#             last_number=1,
-#             status=status,
-#             transaction_date=transaction_date
-#         )
-#         db.session.add(tn)
-#         db.session.commit()
-#     else:
-#         tn.last_number += 1
-#         db.session.commit()
-
-#     txn_str = f"{prefix}-{str(tn.last_number).zfill(5)}"
-#     return tn.id, txn_str
+    """
+    Post a balanced set of entries to the GL. Entries use account codes in
+    'account_id'. Does not commit; the calling route commits once.
+    """
+    posting = LedgerPosting(transaction_no_id, description=description, transaction_date=transaction_date)
+    posting.extend(entries)
+    return posting.flush()
+
+
+def reverse_transaction(transaction_no_id, description_format="Reversal of {}", active_only=False):
+    """
+    Post the mirror image of every GL entry under a transaction number and
+    update account balances to match. Does not commit.
+    """
+    query = GeneralLedger.query.filter_by(transaction_no=transaction_no_id)
+    if active_only:
+        query = query.filter_by(status=1)
+    original_entries = query.all()
+    if not original_entries:
+        return []
+
+    now = datetime.utcnow()
+    rows = [{
+        "account_id": entry.account_id,
+        "transaction_type": 'Credit' if entry.transaction_type == 'Debit' else 'Debit',
+        "amount": entry.amount,
+        "description": description_format.format(entry.description),
+        "transaction_date": now,
+        "transaction_no": transaction_no_id,
+        "status": 1,
+        "created_at": now,
+        "updated_at": now,
+    } for entry in original_entries]
+
+    db.session.execute(insert(GeneralLedger), rows)
+    apply_balance_deltas(rows)
+    return rows
+
+
+
+class TransactionNumberAllocator:
+    """
+    Hi-lo allocator for document numbers.
+
+    Each worker process reserves a block of numbers with one nextval() on
+    transaction_document_seq (whose INCREMENT BY is the block size) and hands
+    them out from memory: no row insert, no lock and no commit per document.
+    Numbers are unique across all prefixes; a restart leaves a gap.
+    """
+
+    def __init__(self, sequence=transaction_document_seq):
+        self.sequence = sequence
+        self._lock = threading.Lock()
+        self._pid = None
+        self._block_size = None
+        self._next = 0
+        self._high = -1
+
+    def _reserve_block(self):
+        if self._block_size is None:
+            self._block_size = db.session.execute(
+                text("SELECT increment_by FROM pg_sequences WHERE sequencename = :name"),
+                {"name": self.sequence.name}
+            ).scalar() or 1
+        start = db.session.execute(select(self.sequence.next_value())).scalar()
+        self._next, self._high = start, start + self._block_size - 1
+
+    def allocate(self):
+        with self._lock:
+            # A forked worker must not reuse its parent's block
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._next, self._high = 0, -1
+            if self._next > self._high:
+                self._reserve_block()
+            number = self._next
+            self._next += 1
+            return number
+
+
+transaction_numbers = TransactionNumberAllocator()
+
+
+def format_transaction_number(prefix, number):
+    return f"{prefix}-{str(number).zfill(5)}"
 
 
 def generate_transaction_number(prefix, transaction_date=None, status=1):
-    if transaction_date is None:
-        transaction_date = datetime.utcnow()
-
-    tn = TransactionNumber.query.filter_by(prefix=prefix).first()
-
-    # if not tn:
-    tn = TransactionNumber(
-        prefix=prefix,
-        last_number=1,
-        status=status,
-        transaction_date=transaction_date
-    )
-    db.session.add(tn)
-    db.session.flush()  # <-- Ensure ID is available before commit
-    # else:
-    #     tn.last_number += 1
-    #     db.session.flush()
-
-    txn_str = f"{prefix}-{str(tn.last_number).zfill(5)}"
-
-    db.session.commit()  # <-- Final commit
-    return tn.id, txn_str
-
-
-def generate_transaction_number_partone(prefix, transaction_date=None, status=1):
-    if transaction_date is None:
-        transaction_date = datetime.utcnow()
-
-    tn = TransactionNumber.query.filter_by(prefix=prefix).first()
-
-    if not tn:
-        tn = TransactionNumber(
-            prefix=prefix,
-            last_number=1,
-            status=status,
-            transaction_date=transaction_date
-        )
-        db.session.add(tn)
-        db.session.flush()  # <-- ensure ID is available
-    else:
-        tn.last_number += 1
-        db.session.flush()
-
-    txn_str = f"{prefix}-{str(tn.last_number).zfill(5)}"
-
-    return tn.id, txn_str
-
+    """
+    Return (transaction_no, 'PREFIX-00042') for a new document.
+    transaction_date and status are accepted for older callers and ignored.
+    """
+    number = transaction_numbers.allocate()
+    return number, format_transaction_number(prefix, number)
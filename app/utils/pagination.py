@@ -0,0 +1,88 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the sort key of the last row on a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return [datetime.fromisoformat(v) if isinstance(v, str) else v for v in values]
+    except ValueError:
+        raise ValueError("Invalid 'after' cursor")
+
+
+def is_paged():
+    """
+    Lists are paged by default (DEFAULT_PAGE_SIZE rows, ?limit= up to
+    MAX_PAGE_SIZE). ?all=1 returns the whole list as a plain array, for
+    clients that do not follow next_cursor yet.
+    """
+    return request.args.get('all') not in ('1', 'true')
+
+
+def page_limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("Invalid 'limit'")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def page_query(query, *keys, descending=True):
+    """
+    The statement paginate() runs: query ordered by keys and, unless the
+    whole list was asked for, narrowed to the rows after ?after= and limited to one
+    more than the page size (to detect a next page).
+    """
+    order_by = [k.desc() for k in keys] if descending else [k.asc() for k in keys]
+    if not is_paged():
+        return query.order_by(*order_by)
+
+    after = request.args.get('after')
+    if after:
+        values = decode_cursor(after, len(keys))
+        key = tuple_(*keys)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+    return query.order_by(*order_by).limit(page_limit() + 1)
+
+
+def paginate(query, *keys, descending=True):
+    """
+    Order query by keys (a unique sort key ending in the id column) and,
+    unless ?all=1, return the page after ?after= using a keyset comparison
+    instead of OFFSET.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = page_query(query, *keys, descending=descending).all()
+    if not is_paged():
+        return rows, None
+
+    limit = page_limit()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], k.key) for k in keys])
+
+
+def page_body(items, next_cursor):
+    """{"items", "next_cursor"} for a page, a plain list for ?all=1."""
+    if not is_paged():
+        return items
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,252 @@
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from app import db
+from app.models import AccountBalanceSnapshot, FiscalPeriod, GeneralLedger
+from app.utils.account_cache import chart_of_accounts
+
+
+GL_STATUS_CLOSING = 2          # GL rows written by a period close
+RETAINED_EARNINGS_CODE = '3100'
+
+
+class PeriodClosedError(ValueError):
+    """Raised when a posting falls inside a closed period."""
+
+
+def to_date(value):
+    """Accept a date, datetime or 'YYYY-MM-DD...' string and return a date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)[:10]).date()
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    return start, date(year, month, monthrange(year, month)[1])
+
+
+def closed_through():
+    """End date of the latest closed period, or None."""
+    return db.session.query(func.max(FiscalPeriod.period_end)).filter(FiscalPeriod.status == 1).scalar()
+
+
+def ensure_period_open(transaction_date):
+    """
+    Raise PeriodClosedError if transaction_date is inside a closed period.
+
+    Only months that have already ended can be closed, so entries dated in
+    the current month skip the lookup entirely.
+    """
+    day = to_date(transaction_date)
+    if day is None or day >= datetime.utcnow().date().replace(day=1):
+        return
+    through = closed_through()
+    if through and day <= through:
+        raise PeriodClosedError(f"Period is closed through {through.isoformat()}; cannot post on {day.isoformat()}.")
+
+
+def ledger_totals(start=None, end=None, account_ids=None, include_closing=True):
+    """
+    Per-account [debit, credit] for GL rows dated in [start, end] (whole days).
+    include_closing=False leaves out period-close entries, as the P&L needs.
+    """
+    query = ledger_totals_between_query(start, end, account_ids, include_closing)
+    return {r.account_id: [float(r.debit_total), float(r.credit_total)] for r in query.all()}
+
+
+def ledger_totals_between_query(start=None, end=None, account_ids=None, include_closing=True):
+    from app.utils.balances import ledger_totals_query
+
+    query = ledger_totals_query()
+    if not include_closing:
+        query = query.filter(GeneralLedger.status != GL_STATUS_CLOSING)
+    if start:
+        query = query.filter(GeneralLedger.transaction_date >= start)
+    if end:
+        query = query.filter(GeneralLedger.transaction_date < end + timedelta(days=1))
+    if account_ids:
+        query = query.filter(GeneralLedger.account_id.in_(account_ids))
+    return query
+
+
+def _snapshot_totals(period_end, account_ids=None):
+    query = AccountBalanceSnapshot.query.filter_by(period_end=period_end)
+    if account_ids:
+        query = query.filter(AccountBalanceSnapshot.account_id.in_(account_ids))
+    return {s.account_id: [s.debit_total, s.credit_total] for s in query.all()}
+
+
+def _merge(*totals):
+    merged = defaultdict(lambda: [0.0, 0.0])
+    for t in totals:
+        for account_id, (debit, credit) in t.items():
+            merged[account_id][0] += debit
+            merged[account_id][1] += credit
+    return merged
+
+
+def balances_as_of(as_of, account_ids=None):
+    """
+    Cumulative {account_id: [debit, credit]} through the end of as_of:
+    the latest closed-period snapshot plus the GL delta since it.
+    """
+    as_of = to_date(as_of)
+    snapshot_end = db.session.query(func.max(FiscalPeriod.period_end)).filter(
+        FiscalPeriod.status == 1, FiscalPeriod.period_end <= as_of
+    ).scalar()
+
+    if snapshot_end is None:
+        return _merge(ledger_totals(end=as_of, account_ids=account_ids))
+
+    return _merge(
+        _snapshot_totals(snapshot_end, account_ids),
+        ledger_totals(start=snapshot_end + timedelta(days=1), end=as_of, account_ids=account_ids),
+    )
+
+
+def closing_entry_totals(account_ids=None):
+    """Per-account [debit, credit] posted by the closing entries of closed periods."""
+    from app.utils.balances import ledger_totals_query
+
+    closing_txns = select(FiscalPeriod.closing_transaction_no).where(
+        FiscalPeriod.status == 1, FiscalPeriod.closing_transaction_no.isnot(None)
+    )
+    query = ledger_totals_query().filter(
+        GeneralLedger.transaction_no.in_(closing_txns),
+        GeneralLedger.status == GL_STATUS_CLOSING
+    )
+    if account_ids:
+        query = query.filter(GeneralLedger.account_id.in_(account_ids))
+    return {r.account_id: [float(r.debit_total), float(r.credit_total)] for r in query.all()}
+
+
+def balances_between(start, end, account_ids=None):
+    """Per-account movement for [start, end] as the difference of two as-of balances."""
+    start, end = to_date(start), to_date(end)
+    closing = balances_as_of(end, account_ids)
+    opening = balances_as_of(start - timedelta(days=1), account_ids)
+    movement = _merge(closing)
+    for account_id, (debit, credit) in opening.items():
+        movement[account_id][0] -= debit
+        movement[account_id][1] -= credit
+    return movement
+
+
+def _closing_entries(totals):
+    """Entries that bring every Revenue/Expense account to zero against Retained Earnings."""
+    entries = []
+    retained = 0.0
+    for account_id, (debit, credit) in totals.items():
+        account = chart_of_accounts.get(account_id)
+        if not account or account.account_type not in ('Revenue', 'Expense'):
+            continue
+        net = round(debit - credit, 2)
+        if net == 0:
+            continue
+        entries.append({"account_id": account.code, "transaction_type": "Credit" if net > 0 else "Debit", "amount": abs(net)})
+        retained += net
+
+    retained = round(retained, 2)
+    if retained:
+        entries.append({"account_id": RETAINED_EARNINGS_CODE, "transaction_type": "Debit" if retained > 0 else "Credit", "amount": abs(retained)})
+    return entries
+
+
+def close_period(year, month, post_closing_entries=False):
+    """
+    Close a calendar month: write per-account cumulative snapshots at its
+    end and lock postings dated inside it. Optionally post closing entries
+    that move Revenue/Expense balances into Retained Earnings (3100).
+    The caller commits.
+    """
+    from app.utils.gl_utils import LedgerPosting, generate_transaction_number
+
+    period_start, period_end = month_bounds(year, month)
+    if period_end >= datetime.utcnow().date():
+        raise ValueError(f"{period_start:%Y-%m} has not ended yet.")
+
+    # One close at a time, and no GL inserts while the snapshot is taken
+    db.session.execute(text("LOCK TABLE fiscal_period IN EXCLUSIVE MODE"))
+    db.session.execute(text("LOCK TABLE general_ledger IN SHARE MODE"))
+
+    previous_end = closed_through()
+    if previous_end and period_end <= previous_end:
+        raise ValueError(f"Periods are already closed through {previous_end.isoformat()}.")
+
+    if previous_end:
+        totals = _merge(_snapshot_totals(previous_end), ledger_totals(start=previous_end + timedelta(days=1), end=period_end))
+    else:
+        totals = _merge(ledger_totals(end=period_end))
+
+    closing_txn_id = None
+    if post_closing_entries:
+        entries = _closing_entries(totals)
+        if entries:
+            closing_txn_id, _ = generate_transaction_number('CLS', transaction_date=period_end)
+            posting = LedgerPosting(
+                closing_txn_id,
+                description=f"Period close {period_start:%Y-%m}",
+                transaction_date=datetime.combine(period_end, datetime.max.time().replace(microsecond=0)),
+                status=GL_STATUS_CLOSING,
+            )
+            rows = posting.extend(entries).flush()
+            for r in rows:
+                totals[r['account_id']][0 if r['transaction_type'] == 'Debit' else 1] += r['amount']
+
+    now = datetime.utcnow()
+    db.session.add_all([
+        AccountBalanceSnapshot(account_id=account_id, period_end=period_end,
+                               debit_total=debit, credit_total=credit, created_at=now)
+        for account_id, (debit, credit) in totals.items()
+    ])
+
+    period = FiscalPeriod.query.filter_by(period_start=period_start).first()
+    if not period:
+        period = FiscalPeriod(period_start=period_start, created_at=now)
+        db.session.add(period)
+    period.period_end = period_end
+    period.closed_at = now
+    period.closing_transaction_no = closing_txn_id
+    period.status = 1
+    period.updated_at = now
+    db.session.flush()
+    return period
+
+
+def reopen_latest_period():
+    """
+    Reopen the most recently closed month: drop its snapshots and void any
+    closing entries it posted. The caller commits.
+    """
+    from app.utils.balances import apply_balance_deltas
+
+    db.session.execute(text("LOCK TABLE fiscal_period IN EXCLUSIVE MODE"))
+    period = FiscalPeriod.query.filter_by(status=1).order_by(FiscalPeriod.period_end.desc()).first()
+    if not period:
+        raise ValueError("No closed period to reopen.")
+
+    if period.closing_transaction_no:
+        closing_rows = GeneralLedger.query.filter_by(
+            transaction_no=period.closing_transaction_no, status=GL_STATUS_CLOSING
+        ).all()
+        apply_balance_deltas([{
+            "account_id": g.account_id, "transaction_type": g.transaction_type, "amount": g.amount
+        } for g in closing_rows], sign=-1)
+        for g in closing_rows:
+            g.status = 9
+            g.updated_at = datetime.utcnow()
+
+    AccountBalanceSnapshot.query.filter_by(period_end=period.period_end).delete(synchronize_session=False)
+    period.status = 0
+    period.closing_transaction_no = None
+    period.updated_at = datetime.utcnow()
+    db.session.flush()
+    return period
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import Permission, User, user_permissions
+
+
+UserGrants = namedtuple('UserGrants', ['loaded_at', 'version', 'role', 'status', 'bits'])
+
+
+class PermissionCache:
+    """
+    Process-wide permission matrix: permission name -> bit (its id), and per
+    user the bitset of active permissions plus role and permissions_version.
+
+    Checks cost no query while an entry is fresh. A user's entry is reloaded
+    when the JWT carries a newer permissions_version than the cached one,
+    when users_bp drops it after a change, or after PERMISSION_CACHE_TTL
+    seconds, which bounds how long another worker process can serve a stale
+    copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bits = None  # name -> bit
+        self._bits_loaded_at = 0
+        self._users = {}  # user_id -> UserGrants
+
+    def _ttl(self):
+        return current_app.config.get('PERMISSION_CACHE_TTL', 60)
+
+    # --- permission names ---
+    def load_permissions(self):
+        rows = db.session.query(Permission.id, Permission.name).filter(Permission.status == 1).all()
+        bits = {r.name: r.id for r in rows}
+        with self._lock:
+            self._bits = bits
+            self._bits_loaded_at = time.monotonic()
+        return bits
+
+    def bit(self, name):
+        """Bit for a permission name, or None when no active permission has that name."""
+        # invalidate() may reset _bits at any moment, so read it once under the lock
+        with self._lock:
+            bits, loaded_at = self._bits, self._bits_loaded_at
+        if bits is None or time.monotonic() - loaded_at > self._ttl():
+            bits = self.load_permissions()
+        return bits.get(name)
+
+    # --- users ---
+    def load_user(self, user_id):
+        row = db.session.query(
+            User.permissions_version, User.role, User.status,
+            func.array_remove(func.array_agg(Permission.id), None).label('permission_ids')
+        ).outerjoin(user_permissions, user_permissions.c.user_id == User.id).outerjoin(
+            Permission, (Permission.id == user_permissions.c.permission_id) & (Permission.status == 1)
+        ).filter(User.id == user_id).group_by(User.id).first()
+        if row is None:
+            self.invalidate_user(user_id)
+            return None
+
+        bits = 0
+        for permission_id in row.permission_ids:
+            bits |= 1 << permission_id
+        grants = UserGrants(time.monotonic(), row.permissions_version, row.role or '', row.status, bits)
+        with self._lock:
+            self._users[user_id] = grants
+        return grants
+
+    def grants(self, user_id, version=None):
+        """Cached grants for a user; reloaded when stale or older than the token's version."""
+        grants = self._users.get(user_id)
+        if (grants is None or time.monotonic() - grants.loaded_at > self._ttl()
+                or (version is not None and version > grants.version)):
+            grants = self.load_user(user_id)
+        return grants
+
+    def allows(self, user_id, name, version=None):
+        grants = self.grants(user_id, version)
+        if grants is None or grants.status != 1:
+            return False
+        if grants.role.lower() == 'admin':
+            return True
+        bit = self.bit(name)
+        return bit is not None and bool(grants.bits >> bit & 1)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._users.clear()
+            self._bits = None
+
+
+permission_cache = PermissionCache()
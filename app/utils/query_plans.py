@@ -0,0 +1,98 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.utils.pagination import encode_cursor, page_query
+from app.utils.streaming import stream_query
+
+
+# Tables that grow with every document; a Seq Scan on these is a regression
+LARGE_TABLES = {
+    'general_ledger', 'sale', 'sale_item', 'payment', 'purchase_order', 'purchase_order_item', 'expense'
+}
+
+# ordered: the statement returns rows in an index's order, so any Sort node is a regression
+PlanCheck = namedtuple('PlanCheck', ['statement', 'ordered'])
+
+
+def hot_queries():
+    """
+    The statements behind the report and list endpoints, keyed by name, built
+    with the same query builders and request arguments the endpoints use.
+    Needs an app context.
+    """
+    from app.routes.expenses import EXPENSES_ORDER, expenses_list_query
+    from app.routes.ledger import LEDGER_ORDER, ledger_list_query, statement_query
+    from app.routes.reports import general_ledger_query
+    from app.routes.sales import SALES_ORDER, sale_items_query, sales_list_query
+    from app.routes.suppliers import PURCHASE_ORDERS_ORDER, purchase_orders_query
+    from app.utils.periods import ledger_totals_between_query
+    from app.utils.stock import latest_purchases_query
+
+    today = datetime.utcnow().date()
+    month = f"from={today - timedelta(days=30)}&to={today}"
+    after = encode_cursor([datetime.combine(today - timedelta(days=7), datetime.min.time()), 2 ** 31 - 1])
+
+    queries = {
+        'ledger_page': ('/?limit=50', lambda: page_query(ledger_list_query(), *LEDGER_ORDER), True),
+        'ledger_next_page': (f'/?limit=50&after={after}', lambda: page_query(ledger_list_query(), *LEDGER_ORDER), True),
+        'ledger_month_page': (f'/?limit=50&{month}', lambda: page_query(ledger_list_query(), *LEDGER_ORDER), True),
+        'ledger_stream': ('/?stream=1', lambda: stream_query(ledger_list_query(), *LEDGER_ORDER), True),
+        'general_ledger_page': ('/?limit=50', lambda: page_query(general_ledger_query(), *LEDGER_ORDER), True),
+        'general_ledger_stream': (f'/?stream=1&{month}', lambda: stream_query(general_ledger_query(), *LEDGER_ORDER), True),
+        'account_statement': (f'/?limit=100&{month}', lambda: statement_query(1).limit(101), True),
+        'sales_page': ('/?limit=50', lambda: page_query(sales_list_query(), *SALES_ORDER), True),
+        'sales_month_page': (f'/?limit=50&{month}', lambda: page_query(sales_list_query(), *SALES_ORDER), True),
+        'sale_items_for_page': ('/', lambda: sale_items_query(list(range(1, 51))), False),
+        'expenses_page': ('/?limit=50', lambda: page_query(expenses_list_query(), *EXPENSES_ORDER), True),
+        'purchase_orders_page': ('/?limit=50', lambda: page_query(purchase_orders_query(), *PURCHASE_ORDERS_ORDER), True),
+        'latest_purchase_prices': ('/', lambda: latest_purchases_query([1, 2, 3]), False),
+        'ledger_totals_for_range': ('/', lambda: ledger_totals_between_query(
+            today - timedelta(days=30), today, account_ids=[1, 2, 3]
+        ), False),
+    }
+
+    checks = {}
+    for name, (path, build, ordered) in queries.items():
+        with current_app.test_request_context(path):
+            checks[name] = PlanCheck(build().statement, ordered)
+    return checks
+
+
+def explain(stmt):
+    """Return the JSON plan Postgres picks for a statement with the current statistics."""
+    compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True})
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return plan[0]['Plan']
+
+
+def plan_nodes(plan):
+    """Every node of a plan tree, depth first."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def plan_problems(check):
+    """Seq Scans of large tables, and Sort nodes in an ordered statement, as readable strings."""
+    problems = []
+    for node in plan_nodes(explain(check.statement)):
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in LARGE_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+        elif check.ordered and node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append(f"{node['Node Type']} on {', '.join(node.get('Sort Key', []))}")
+    return problems
+
+
+def check_query_plans():
+    """
+    {query name: [problems]} for every hot query. Only meaningful against
+    a database with production-sized, ANALYZEd tables: on a near-empty
+    one the planner rightly prefers sequential scans. Rolls back the session.
+    """
+    try:
+        return {name: plan_problems(check) for name, check in hot_queries().items()}
+    finally:
+        db.session.rollback()
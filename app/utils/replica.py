@@ -0,0 +1,112 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+
+READ_BIND_KEY = 'replica'
+
+_lag_lock = threading.Lock()
+_lag_state = {}  # engine url -> (checked_at, healthy)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (an idle primary otherwise looks like growing lag) or is not a standby at all.
+REPLICA_LAG_SQL = sa.text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class RoutingSession(Session):
+    """
+    db.session that sends reads to the replica bind while a request is
+    marked read-only (see read_replica). Flushes and INSERT/UPDATE/DELETE
+    statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, sa.UpdateBase)
+                and has_request_context() and getattr(request, 'read_bind_key', None)):
+            engine = self._db.engines.get(request.read_bind_key)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_lag(engine):
+    """Replication lag of the replica in seconds."""
+    with engine.connect() as conn:
+        return float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+
+
+def replica_available():
+    """
+    True when a replica bind is configured, reachable and no more than
+    REPLICA_MAX_LAG seconds behind. The result is reused for
+    REPLICA_LAG_CHECK_INTERVAL seconds so requests don't each pay for the check.
+    """
+    from app import db
+
+    engine = db.engines.get(READ_BIND_KEY)
+    if engine is None:
+        return False
+
+    key = str(engine.url)
+    interval = current_app.config.get('REPLICA_LAG_CHECK_INTERVAL', 5)
+    checked = _lag_state.get(key)
+    if checked and time.monotonic() - checked[0] <= interval:
+        return checked[1]
+
+    with _lag_lock:
+        checked = _lag_state.get(key)  # checked while we waited
+        if checked and time.monotonic() - checked[0] <= interval:
+            return checked[1]
+        try:
+            lag = replica_lag(engine)
+            healthy = lag <= current_app.config.get('REPLICA_MAX_LAG', 30)
+            if not healthy:
+                current_app.logger.warning("Replica is %.1fs behind; reading from the primary.", lag)
+        except sa.exc.SQLAlchemyError as e:
+            current_app.logger.warning("Replica unavailable (%s); reading from the primary.", e.__class__.__name__)
+            healthy = False
+        _lag_state[key] = (time.monotonic(), healthy)
+        return healthy
+
+
+def use_read_replica():
+    """
+    Route the rest of this request's reads to the replica when it is healthy.
+    Usable as a blueprint before_request hook; only GET requests are routed.
+    """
+    if request.method == 'GET' and replica_available():
+        request.read_bind_key = READ_BIND_KEY
+
+
+def read_replica(view):
+    """Serve a read-only endpoint from the replica. Goes below the route decorator."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        use_read_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def reads_from_primary():
+    """Send the request's reads to the primary inside the block, e.g. when the replica may be behind a write."""
+    if not has_request_context():
+        yield
+        return
+    read_bind_key = getattr(request, 'read_bind_key', None)
+    request.read_bind_key = None
+    try:
+        yield
+    finally:
+        request.read_bind_key = read_bind_key
@@ -0,0 +1,135 @@
+from datetime import datetime
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import db
+from app.models import DailyExpenseSummary, DailySalesSummary, Expense, GeneralLedger, Sale, SaleItem
+from app.utils.account_cache import chart_of_accounts
+from app.utils.periods import to_date
+
+
+COGS_ACCOUNT_CODE = '5000'
+INACTIVE_SALE_STATUSES = (0, 9)   # soft-deleted / voided
+ACTIVE_EXPENSE_STATUS = 1
+
+SALE_FIELDS = ('sales_count', 'total_amount', 'total_paid', 'items_sold', 'cogs')
+EXPENSE_FIELDS = ('expense_count', 'total_amount')
+
+
+def _upsert_deltas(model, fields, day, deltas):
+    """Add deltas to the day's row, creating it if needed (safe under concurrent writers)."""
+    if day is None or not any(deltas.get(f) for f in fields):
+        return
+    values = {f: deltas.get(f, 0) for f in fields}
+    stmt = pg_insert(model).values(day=day, updated_at=datetime.utcnow(), **values)
+    set_ = {f: getattr(model, f) + stmt.excluded[f] for f in fields}
+    set_['updated_at'] = stmt.excluded.updated_at
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[model.day], set_=set_))
+
+
+def _apply_change(model, fields, before, after):
+    """before/after are (day, figures) or None; write the difference."""
+    if before and after and before[0] == after[0]:
+        _upsert_deltas(model, fields, after[0], {f: after[1][f] - before[1][f] for f in fields})
+        return
+    if before:
+        _upsert_deltas(model, fields, before[0], {f: -before[1][f] for f in fields})
+    if after:
+        _upsert_deltas(model, fields, after[0], after[1])
+
+
+def _sale_cogs(transaction_no):
+    if not transaction_no:
+        return 0.0
+    cogs_id = chart_of_accounts.id_for_code(COGS_ACCOUNT_CODE)
+    return float(db.session.query(func.coalesce(func.sum(
+        case((GeneralLedger.transaction_type == 'Debit', GeneralLedger.amount), else_=-GeneralLedger.amount)
+    ), 0)).filter(
+        GeneralLedger.transaction_no == transaction_no,
+        GeneralLedger.account_id == cogs_id,
+        GeneralLedger.status != 9
+    ).scalar())
+
+
+def sale_figures(sale):
+    """(day, figures) a sale currently contributes to daily_sales_summary, or None if inactive."""
+    if sale.status in INACTIVE_SALE_STATUSES:
+        return None
+    return to_date(sale.sale_date), {
+        'sales_count': 1,
+        'total_amount': sale.total_amount or 0,
+        'total_paid': sale.total_paid or 0,
+        'items_sold': sum(i.quantity or 0 for i in sale.items if i.status == 1),
+        'cogs': _sale_cogs(sale.transaction_no),
+    }
+
+
+def record_sale_change(before, after):
+    """Apply the change between two sale_figures() results. Caller commits."""
+    _apply_change(DailySalesSummary, SALE_FIELDS, before, after)
+
+
+def expense_figures(expense):
+    """(day, figures) an expense currently contributes to daily_expense_summary, or None."""
+    if expense.status != ACTIVE_EXPENSE_STATUS:
+        return None
+    return to_date(expense.expense_date), {
+        'expense_count': 1,
+        'total_amount': expense.total_amount or 0,
+    }
+
+
+def record_expense_change(before, after):
+    _apply_change(DailyExpenseSummary, EXPENSE_FIELDS, before, after)
+
+
+def rebuild_daily_summaries():
+    """Recompute both rollup tables from sales and expenses. Caller commits."""
+    now = datetime.utcnow()
+    sale_day = func.date(Sale.sale_date)
+    active_sale = Sale.status.notin_(INACTIVE_SALE_STATUSES)
+
+    sales = {
+        r.day: {'sales_count': r.sales_count, 'total_amount': float(r.total_amount),
+                'total_paid': float(r.total_paid), 'items_sold': 0, 'cogs': 0.0}
+        for r in db.session.query(
+            sale_day.label('day'),
+            func.count(Sale.id).label('sales_count'),
+            func.coalesce(func.sum(Sale.total_amount), 0).label('total_amount'),
+            func.coalesce(func.sum(Sale.total_paid), 0).label('total_paid'),
+        ).filter(active_sale, Sale.sale_date.isnot(None)).group_by(sale_day)
+    }
+    for r in db.session.query(sale_day.label('day'), func.sum(SaleItem.quantity).label('qty')) \
+            .join(Sale, Sale.id == SaleItem.sale_id) \
+            .filter(active_sale, SaleItem.status == 1, Sale.sale_date.isnot(None)).group_by(sale_day):
+        sales[r.day]['items_sold'] = int(r.qty or 0)
+
+    cogs_id = chart_of_accounts.id_for_code(COGS_ACCOUNT_CODE)
+    for r in db.session.query(
+        sale_day.label('day'),
+        func.sum(case((GeneralLedger.transaction_type == 'Debit', GeneralLedger.amount), else_=-GeneralLedger.amount)).label('cogs')
+    ).join(GeneralLedger, GeneralLedger.transaction_no == Sale.transaction_no) \
+            .filter(active_sale, GeneralLedger.account_id == cogs_id, GeneralLedger.status != 9,
+                    Sale.sale_date.isnot(None)).group_by(sale_day):
+        sales[r.day]['cogs'] = float(r.cogs or 0)
+
+    expense_day = func.date(Expense.expense_date)
+    expenses = db.session.query(
+        expense_day.label('day'),
+        func.count(Expense.id).label('expense_count'),
+        func.coalesce(func.sum(Expense.total_amount), 0).label('total_amount'),
+    ).filter(Expense.status == ACTIVE_EXPENSE_STATUS, Expense.expense_date.isnot(None)).group_by(expense_day).all()
+
+    db.session.query(DailySalesSummary).delete(synchronize_session=False)
+    db.session.query(DailyExpenseSummary).delete(synchronize_session=False)
+    if sales:
+        db.session.execute(pg_insert(DailySalesSummary).values([
+            dict(day=day, updated_at=now, **figures) for day, figures in sales.items()
+        ]))
+    if expenses:
+        db.session.execute(pg_insert(DailyExpenseSummary).values([
+            dict(day=r.day, expense_count=r.expense_count, total_amount=float(r.total_amount), updated_at=now)
+            for r in expenses
+        ]))
+    return len(sales), len(expenses)
@@ -0,0 +1,95 @@
+"""
+Production serving with gunicorn.
+
+The module doubles as a gunicorn config module, so the WSGI entry point can
+also be started directly:
+
+    gunicorn -c python:app.utils.serving wsgi:app
+
+With preload_app the app is imported once in the master and bootstrapped by
+the when_ready hook, before any worker forks; workers only need fresh
+database connections. Importing wsgi itself has no side effects, so plain
+`flask --app wsgi ...` commands do not touch the database.
+"""
+from app.config import Config
+
+
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = 'gthread'  # each worker serves `threads` requests at once
+timeout = Config.SERVER_TIMEOUT
+preload_app = True
+accesslog = '-'
+
+
+def bootstrap(app):
+    """
+    One-time startup work: seed missing accounts and warm the chart of
+    accounts. Returns the names of the accounts added; later calls on the
+    same app are no-ops.
+    """
+    from app import db
+    from app.utils.account_cache import chart_of_accounts
+    from app.utils.chart_of_accounts import seed_chart_of_accounts
+
+    if app.extensions.get('bootstrapped'):
+        return []
+    with app.app_context():
+        added = seed_chart_of_accounts()
+        db.session.commit()
+        chart_of_accounts.load()
+        # Forked workers must not share the master's sockets
+        for engine in db.engines.values():
+            engine.dispose()
+    app.extensions['bootstrapped'] = True
+    return added
+
+
+def when_ready(server):
+    """Bootstrap in the master once the app is loaded and before workers are forked."""
+    added = bootstrap(server.app.wsgi())
+    if added:
+        server.log.info("Added missing accounts: %s", ', '.join(added))
+
+
+def post_fork(server, worker):
+    """Drop any pooled connection inherited from the master without closing it under the master."""
+    from app import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def gunicorn_options(**overrides):
+    """This module's settings as a gunicorn options dict, with non-None overrides applied."""
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': worker_class,
+        'timeout': timeout,
+        'preload_app': preload_app,
+        'accesslog': accesslog,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return options
+
+
+def serve(app, **overrides):
+    """Run app under gunicorn in this process; the when_ready hook bootstraps it if needed."""
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options(**overrides).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
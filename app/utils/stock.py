@@ -0,0 +1,209 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import db
+from app.models import Product, ProductCost, PurchaseOrderItem
+
+
+def parse_quantity(value):
+    """A line quantity as an int. Fractions, booleans and non-numbers raise ValueError."""
+    if isinstance(value, bool):
+        raise ValueError("Item quantities must be whole numbers")
+    try:
+        quantity = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError("Item quantities must be whole numbers")
+    if not quantity.is_finite() or quantity != quantity.to_integral_value():
+        raise ValueError("Item quantities must be whole numbers")
+    return int(quantity)
+
+
+def sum_quantities(items, key='product_id'):
+    """
+    Total requested quantity per product for a list of line dicts. Raises
+    ValueError, with a message fit for a 400, on a missing or malformed
+    product id or quantity.
+    """
+    totals = defaultdict(int)
+    for item in items:
+        try:
+            product_id, quantity = item[key], item['quantity']
+        except (KeyError, TypeError):
+            raise ValueError("Each item needs a product_id and quantity")
+        if isinstance(product_id, bool) or not str(product_id).strip().isdigit():
+            raise ValueError("Each item needs a product_id and quantity")
+        totals[int(product_id)] += parse_quantity(quantity)
+    return dict(totals)
+
+
+def lock_products(product_ids):
+    """
+    Load products with SELECT ... FOR UPDATE in one query, always in id order
+    so concurrent documents touching the same items cannot deadlock.
+    """
+    if not product_ids:
+        return {}
+    products = (
+        Product.query
+        .filter(Product.id.in_(product_ids))
+        .order_by(Product.id)
+        .with_for_update()
+        .all()
+    )
+    return {p.id: p for p in products}
+
+
+def apply_stock_deltas(deltas):
+    """Add {product_id: delta} to product.quantity in one set-based UPDATE."""
+    deltas = {pid: qty for pid, qty in deltas.items() if qty}
+    if not deltas:
+        return
+    db.session.execute(
+        update(Product)
+        .where(Product.id.in_(list(deltas)))
+        .values(
+            quantity=func.coalesce(Product.quantity, 0) + case(deltas, value=Product.id),
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def product_costs(product_ids):
+    """{product_id: ProductCost} for a set of products, in one query."""
+    if not product_ids:
+        return {}
+    return {c.product_id: c for c in ProductCost.query.filter(ProductCost.product_id.in_(list(product_ids))).all()}
+
+
+def unit_cost(cost, method='last'):
+    """COGS unit cost for a ProductCost row: 'last' purchase price or 'average'."""
+    if cost is None:
+        return None
+    return cost.average_cost if method == 'average' else cost.last_cost
+
+
+def latest_purchase_prices(product_ids):
+    """{product_id: unit_price} of each product's newest active purchase line (same order as rebuild)."""
+    if not product_ids:
+        return {}
+    return {r.product_id: r.unit_price for r in latest_purchases_query(product_ids).all()}
+
+
+def latest_purchases_query(product_ids):
+    return (
+        db.session.query(PurchaseOrderItem.product_id, PurchaseOrderItem.unit_price)
+        .filter(PurchaseOrderItem.product_id.in_(list(product_ids)), PurchaseOrderItem.status == 1)
+        .distinct(PurchaseOrderItem.product_id)
+        .order_by(PurchaseOrderItem.product_id, PurchaseOrderItem.created_at.desc(), PurchaseOrderItem.id.desc())
+    )
+
+
+def apply_purchase_costs(changes, products):
+    """
+    Fold purchase changes into product_cost incrementally.
+
+    changes:  {product_id: (quantity_delta, value_delta, unit_price)}
+    products: {product_id: Product} locked rows, quantities *before* the change
+
+    last_cost always follows the newest purchase line, so editing an older
+    order leaves it alone. A product without a cost row values the stock
+    already on hand at the incoming price rather than at zero.
+    """
+    if not changes:
+        return
+    costs = {
+        c.product_id: c for c in ProductCost.query
+        .filter(ProductCost.product_id.in_(list(changes)))
+        .order_by(ProductCost.product_id)
+        .with_for_update()
+        .all()
+    }
+    latest = latest_purchase_prices(changes)  # autoflush includes this document's lines
+
+    now = datetime.utcnow()
+    values = []
+    for product_id, (qty_delta, value_delta, unit_price) in sorted(changes.items()):
+        cost = costs.get(product_id)
+        product = products.get(product_id)
+        old_qty = max((product.quantity if product else 0) or 0, 0)
+        old_avg = cost.average_cost if cost else (unit_price or 0)
+
+        new_qty = old_qty + qty_delta
+        new_value = old_qty * old_avg + value_delta
+        new_avg = new_value / new_qty if new_qty > 0 else (unit_price or old_avg)
+
+        last_cost = latest.get(product_id)
+        if last_cost is None:
+            last_cost = cost.last_cost if cost else (unit_price or 0)
+
+        values.append({
+            "product_id": product_id,
+            "last_cost": last_cost,
+            "average_cost": round(new_avg, 4),
+            "inventory_value": round(max(new_qty, 0) * new_avg, 2),
+            "updated_at": now,
+        })
+
+    stmt = pg_insert(ProductCost).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductCost.product_id],
+        set_={col: stmt.excluded[col] for col in ("last_cost", "average_cost", "inventory_value", "updated_at")}
+    )
+    db.session.execute(stmt)
+
+
+def adjust_inventory_value(deltas):
+    """Move {product_id: quantity_delta} in or out of inventory_value at average cost."""
+    deltas = {pid: qty for pid, qty in deltas.items() if qty}
+    if not deltas:
+        return
+    db.session.execute(
+        update(ProductCost)
+        .where(ProductCost.product_id.in_(list(deltas)))
+        .values(
+            inventory_value=ProductCost.inventory_value + case(deltas, value=ProductCost.product_id) * ProductCost.average_cost,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_product_costs():
+    """Recompute product_cost from purchase history. Caller commits."""
+    latest = (
+        db.session.query(
+            PurchaseOrderItem.product_id,
+            PurchaseOrderItem.unit_price,
+            func.row_number().over(
+                partition_by=PurchaseOrderItem.product_id,
+                order_by=(PurchaseOrderItem.created_at.desc(), PurchaseOrderItem.id.desc())
+            ).label('rn')
+        ).filter(PurchaseOrderItem.status == 1).subquery()
+    )
+    last_costs = dict(db.session.query(latest.c.product_id, latest.c.unit_price).filter(latest.c.rn == 1).all())
+
+    averages = dict(
+        db.session.query(
+            PurchaseOrderItem.product_id,
+            func.sum(PurchaseOrderItem.total_price) / func.nullif(func.sum(PurchaseOrderItem.quantity), 0)
+        ).filter(PurchaseOrderItem.status == 1).group_by(PurchaseOrderItem.product_id).all()
+    )
+    on_hand = dict(db.session.query(Product.id, Product.quantity).filter(Product.id.in_(list(last_costs))).all())
+
+    now = datetime.utcnow()
+    db.session.query(ProductCost).delete(synchronize_session=False)
+    rows = [{
+        "product_id": product_id,
+        "last_cost": last_cost or 0,
+        "average_cost": float(averages.get(product_id) or 0),
+        "inventory_value": round(max(on_hand.get(product_id) or 0, 0) * float(averages.get(product_id) or 0), 2),
+        "updated_at": now,
+    } for product_id, last_cost in last_costs.items()]
+    if rows:
+        db.session.execute(pg_insert(ProductCost).values(rows))
+    return len(rows)
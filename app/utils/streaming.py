@@ -0,0 +1,36 @@
+from flask import Response, current_app, request, stream_with_context
+
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream():
+    """?stream=1, or an Accept header that prefers NDJSON over JSON."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def stream_query(query, *keys, descending=True, batch_size=STREAM_BATCH_SIZE):
+    """
+    Order query by keys and read it through a server-side cursor,
+    batch_size rows at a time, instead of loading the whole result.
+
+    keys must be the leading columns of an index (the ledger streams use
+    ix_general_ledger_date): the cursor is then planned as an index scan
+    and the first rows go out immediately, where an unindexed order would
+    make Postgres sort the whole table before returning anything.
+    """
+    order_by = [k.desc() for k in keys] if descending else [k.asc() for k in keys]
+    return query.order_by(*order_by).execution_options(stream_results=True).yield_per(batch_size)
+
+
+def ndjson_response(rows, serialize):
+    """Stream one JSON document per row; nothing runs until the client starts reading."""
+    def generate():
+        dumps = current_app.json.dumps
+        for row in rows:
+            yield dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
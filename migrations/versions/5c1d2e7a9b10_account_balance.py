@@ -0,0 +1,43 @@
+"""account balance table
+
+Revision ID: 5c1d2e7a9b10
+Revises: 148e345e53fb
+Create Date: 2026-10-18 09:12:31.402113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1d2e7a9b10'
+down_revision = '148e345e53fb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('account_balance',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('debit_total', sa.Float(), nullable=False),
+    sa.Column('credit_total', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+
+    # Seed from the existing ledger so balances start in step with the GL
+    op.execute("""
+        INSERT INTO account_balance (account_id, debit_total, credit_total, updated_at)
+        SELECT account_id,
+               COALESCE(SUM(CASE WHEN transaction_type = 'Debit' THEN amount ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN transaction_type = 'Credit' THEN amount ELSE 0 END), 0),
+               now()
+        FROM general_ledger
+        WHERE status != 9
+        GROUP BY account_id
+    """)
+
+
+def downgrade():
+    op.drop_table('account_balance')
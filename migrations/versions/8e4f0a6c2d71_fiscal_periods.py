@@ -0,0 +1,45 @@
+"""fiscal periods and balance snapshots
+
+Revision ID: 8e4f0a6c2d71
+Revises: 5c1d2e7a9b10
+Create Date: 2026-10-18 10:41:07.118540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f0a6c2d71'
+down_revision = '5c1d2e7a9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fiscal_period',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('period_end', sa.Date(), nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.Column('closing_transaction_no', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period_start')
+    )
+    op.create_table('account_balance_snapshot',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('period_end', sa.Date(), nullable=False),
+    sa.Column('debit_total', sa.Float(), nullable=False),
+    sa.Column('credit_total', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'period_end')
+    )
+
+
+def downgrade():
+    op.drop_table('account_balance_snapshot')
+    op.drop_table('fiscal_period')
@@ -0,0 +1,44 @@
+"""transaction document sequence replaces transaction_number rows
+
+Revision ID: a3f7c9e1b254
+Revises: 8e4f0a6c2d71
+Create Date: 2026-10-18 12:03:55.640921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f7c9e1b254'
+down_revision = '8e4f0a6c2d71'
+branch_labels = None
+depends_on = None
+
+
+# Tables whose transaction_no pointed at transaction_number.id
+TRANSACTION_NO_TABLES = [
+    'general_ledger', 'sale', 'sale_item', 'payment', 'purchase_order',
+    'supplier_payment', 'inventory_transaction', 'stock_adjustment', 'expense',
+]
+
+
+def upgrade():
+    # INCREMENT BY is the per-process block size used by TransactionNumberAllocator
+    op.execute("CREATE SEQUENCE IF NOT EXISTS transaction_document_seq START WITH 1 INCREMENT BY 20")
+    # Continue above every number already handed out by the old row-per-document scheme
+    op.execute("""
+        SELECT setval('transaction_document_seq',
+                      COALESCE((SELECT MAX(id) FROM transaction_number), 0) + 1,
+                      false)
+    """)
+
+    # Documents no longer get a transaction_number row, so the FKs have to go
+    for table in TRANSACTION_NO_TABLES:
+        op.execute(f'ALTER TABLE IF EXISTS "{table}" DROP CONSTRAINT IF EXISTS "{table}_transaction_no_fkey"')
+
+
+def downgrade():
+    # Foreign keys are not restored: numbers issued by the sequence have no
+    # transaction_number row to point at.
+    op.execute("DROP SEQUENCE IF EXISTS transaction_document_seq")
@@ -0,0 +1,28 @@
+"""indexes matching the keyset order of the ledger, sales and purchase order lists
+
+Revision ID: a5c9e3f17b42
+Revises: f4a8d2c6e913
+Create Date: 2026-10-18 17:21:09.402733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c9e3f17b42'
+down_revision = 'f4a8d2c6e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_general_ledger_date', 'general_ledger', ['transaction_date', 'id'])
+    op.create_index('ix_sale_date', 'sale', ['sale_date', 'id'])
+    op.create_index('ix_purchase_order_date', 'purchase_order', ['purchase_date', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_purchase_order_date', table_name='purchase_order')
+    op.drop_index('ix_sale_date', table_name='sale')
+    op.drop_index('ix_general_ledger_date', table_name='general_ledger')
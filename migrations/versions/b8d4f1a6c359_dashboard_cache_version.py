@@ -0,0 +1,25 @@
+"""version sequence for the dashboard cache
+
+Revision ID: b8d4f1a6c359
+Revises: a5c9e3f17b42
+Create Date: 2026-10-18 18:02:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f1a6c359'
+down_revision = 'a5c9e3f17b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Advanced by dashboard_cache.invalidate(); workers drop entries stamped with an older value
+    op.execute("CREATE SEQUENCE IF NOT EXISTS dashboard_cache_version_seq")
+
+
+def downgrade():
+    op.execute("DROP SEQUENCE IF EXISTS dashboard_cache_version_seq")
@@ -0,0 +1,25 @@
+"""version sequence for the debtors cache
+
+Revision ID: c2e6a9d47f18
+Revises: b8d4f1a6c359
+Create Date: 2026-10-18 18:20:07.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e6a9d47f18'
+down_revision = 'b8d4f1a6c359'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Advanced by debtors_cache.invalidate(); workers drop entries stamped with an older value
+    op.execute("CREATE SEQUENCE IF NOT EXISTS debtors_cache_version_seq")
+
+
+def downgrade():
+    op.execute("DROP SEQUENCE IF EXISTS debtors_cache_version_seq")
@@ -0,0 +1,56 @@
+"""product_cost table with last and weighted-average purchase cost
+
+Revision ID: c6d2b8f41e07
+Revises: a3f7c9e1b254
+Create Date: 2026-10-18 13:20:11.402517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d2b8f41e07'
+down_revision = 'a3f7c9e1b254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_cost',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('last_cost', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('average_cost', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('inventory_value', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+        sa.PrimaryKeyConstraint('product_id')
+    )
+
+    # Backfill from purchase history (same rules as `flask product-costs rebuild`)
+    op.execute("""
+        INSERT INTO product_cost (product_id, last_cost, average_cost, inventory_value, updated_at)
+        SELECT latest.product_id,
+               COALESCE(latest.unit_price, 0),
+               COALESCE(avg_cost.average_cost, 0),
+               ROUND((GREATEST(COALESCE(p.quantity, 0), 0) * COALESCE(avg_cost.average_cost, 0))::numeric, 2),
+               now()
+        FROM (
+            SELECT DISTINCT ON (product_id) product_id, unit_price
+            FROM purchase_order_item
+            WHERE status = 1
+            ORDER BY product_id, created_at DESC, id DESC
+        ) latest
+        JOIN product p ON p.id = latest.product_id
+        LEFT JOIN (
+            SELECT product_id, SUM(total_price) / NULLIF(SUM(quantity), 0) AS average_cost
+            FROM purchase_order_item
+            WHERE status = 1
+            GROUP BY product_id
+        ) avg_cost ON avg_cost.product_id = latest.product_id
+    """)
+
+
+def downgrade():
+    op.drop_table('product_cost')
@@ -0,0 +1,38 @@
+"""secondary indexes for ledger, sales, payments, purchases and expenses
+
+Revision ID: d1a94f3c7b58
+Revises: c6d2b8f41e07
+Create Date: 2026-10-18 13:58:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a94f3c7b58'
+down_revision = 'c6d2b8f41e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_general_ledger_account_date', 'general_ledger',
+                    ['account_id', 'transaction_date', 'id'],
+                    postgresql_where=sa.text('status != 9'))
+    op.create_index('ix_general_ledger_transaction_no', 'general_ledger', ['transaction_no'])
+    op.create_index('ix_sale_item_sale_status', 'sale_item', ['sale_id', 'status'])
+    op.create_index('ix_payment_sale_status', 'payment', ['sale_id', 'status'])
+    op.create_index('ix_purchase_order_item_product_created', 'purchase_order_item', ['product_id', 'created_at'])
+    op.create_index('ix_sale_status_date', 'sale', ['status', 'sale_date', 'id'])
+    op.create_index('ix_expense_status_date', 'expense', ['status', 'expense_date', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_expense_status_date', table_name='expense')
+    op.drop_index('ix_sale_status_date', table_name='sale')
+    op.drop_index('ix_purchase_order_item_product_created', table_name='purchase_order_item')
+    op.drop_index('ix_payment_sale_status', table_name='payment')
+    op.drop_index('ix_sale_item_sale_status', table_name='sale_item')
+    op.drop_index('ix_general_ledger_transaction_no', table_name='general_ledger')
+    op.drop_index('ix_general_ledger_account_date', table_name='general_ledger')
@@ -0,0 +1,76 @@
+"""daily_sales_summary and daily_expense_summary rollups
+
+Revision ID: e7b3c5a90d24
+Revises: d1a94f3c7b58
+Create Date: 2026-10-18 15:06:27.530911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c5a90d24'
+down_revision = 'd1a94f3c7b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_sales_summary',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sales_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('total_paid', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('items_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cogs', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table(
+        'daily_expense_summary',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('expense_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+    # Backfill (same rules as `flask rollups rebuild`)
+    op.execute("""
+        INSERT INTO daily_sales_summary (day, sales_count, total_amount, total_paid, items_sold, cogs, updated_at)
+        SELECT s.sale_date::date,
+               COUNT(*),
+               COALESCE(SUM(s.total_amount), 0),
+               COALESCE(SUM(s.total_paid), 0),
+               COALESCE(SUM(items.qty), 0),
+               COALESCE(SUM(cogs.amount), 0),
+               now()
+        FROM sale s
+        LEFT JOIN (
+            SELECT sale_id, SUM(quantity) AS qty FROM sale_item WHERE status = 1 GROUP BY sale_id
+        ) items ON items.sale_id = s.id
+        LEFT JOIN (
+            SELECT g.transaction_no,
+                   SUM(CASE WHEN g.transaction_type = 'Debit' THEN g.amount ELSE -g.amount END) AS amount
+            FROM general_ledger g
+            JOIN account a ON a.id = g.account_id AND a.code = '5000'
+            WHERE g.status != 9
+            GROUP BY g.transaction_no
+        ) cogs ON cogs.transaction_no = s.transaction_no
+        WHERE s.status NOT IN (0, 9) AND s.sale_date IS NOT NULL
+        GROUP BY s.sale_date::date
+    """)
+    op.execute("""
+        INSERT INTO daily_expense_summary (day, expense_count, total_amount, updated_at)
+        SELECT expense_date::date, COUNT(*), COALESCE(SUM(total_amount), 0), now()
+        FROM expense
+        WHERE status = 1 AND expense_date IS NOT NULL
+        GROUP BY expense_date::date
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_expense_summary')
+    op.drop_table('daily_sales_summary')
@@ -0,0 +1,26 @@
+"""user.permissions_version for the permission cache
+
+Revision ID: f4a8d2c6e913
+Revises: e7b3c5a90d24
+Create Date: 2026-10-18 16:02:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a8d2c6e913'
+down_revision = 'e7b3c5a90d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('permissions_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('permissions_version')
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture
+def client():
+    """Test client on an empty in-memory SQLite database, for checks that stop before any query."""
+    from app import create_app
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_BINDS': {},
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    return app.test_client()
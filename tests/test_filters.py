@@ -0,0 +1,26 @@
+from datetime import date
+
+import pytest
+
+from app.utils.filters import add_months, period_bounds
+
+
+@pytest.mark.parametrize('day, months, expected', [
+    (date(2026, 1, 31), 1, date(2026, 2, 1)),
+    (date(2026, 1, 15), -1, date(2025, 12, 1)),
+    (date(2026, 3, 1), -12, date(2025, 3, 1)),
+    (date(2026, 11, 30), 14, date(2028, 1, 1)),
+    (date(2026, 5, 9), 0, date(2026, 5, 1)),
+])
+def test_add_months_lands_on_the_first_of_the_month(day, months, expected):
+    assert add_months(day, months) == expected
+
+
+@pytest.mark.parametrize('period, expected', [
+    ('last_month', (date(2025, 12, 1), date(2025, 12, 31))),
+    ('last_quarter', (date(2025, 10, 1), date(2025, 12, 31))),
+    ('2024-02', (date(2024, 2, 1), date(2024, 2, 29))),
+    ('2026-Q4', (date(2026, 10, 1), date(2026, 12, 31))),
+])
+def test_period_bounds(period, expected):
+    assert period_bounds(period, today=date(2026, 1, 15)) == expected
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize('method, path', [
+    ('post', '/api/periods/close'),
+    ('post', '/api/periods/reopen'),
+    ('get', '/api/periods/'),
+    ('get', '/api/periods/balances'),
+])
+def test_period_routes_require_a_token(client, method, path):
+    response = getattr(client, method)(path, json={'year': 2026, 'month': 9})
+    assert response.status_code == 401
+
+
+def test_close_rejects_an_invalid_token(client):
+    response = client.post('/api/periods/close', json={'year': 2026, 'month': 9},
+                           headers={'Authorization': 'Bearer not-a-token'})
+    assert response.status_code == 401
@@ -0,0 +1,100 @@
+"""
+Query-plan regression tests for the report and list endpoints.
+
+Seeds production-sized data into a throwaway Postgres database, ANALYZEs
+it, and EXPLAINs the statements the endpoints build (app.utils.query_plans)
+with the planner left at its defaults. A Seq Scan on a large table, or a
+Sort in a list that should come straight off an index, fails the test.
+
+Needs TEST_DATABASE_URL pointing at an empty database; every table in it
+is dropped afterwards.
+"""
+import os
+
+import pytest
+from sqlalchemy import text
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+SEED_SQL = """
+INSERT INTO category (id, name, status) VALUES (1, 'Tools', 1);
+INSERT INTO product (id, name, sku, category_id, quantity, price, status)
+SELECT g, 'Product ' || g, 'SKU' || g, 1, 100, 10, 1 FROM generate_series(1, 500) g;
+INSERT INTO customer (id, name, status) VALUES (1, 'Walk-in', 1);
+INSERT INTO supplier (id, name, status) VALUES (1, 'Supplier', 1);
+
+INSERT INTO general_ledger (account_id, transaction_type, amount, description, transaction_date,
+                            status, transaction_no, created_at, updated_at)
+SELECT 1 + g % 40, CASE WHEN g % 2 = 0 THEN 'Debit' ELSE 'Credit' END, 10, 'Seed',
+       now() - (g || ' minutes')::interval, CASE WHEN g % 50 = 0 THEN 9 ELSE 1 END, g / 2, now(), now()
+FROM generate_series(1, 200000) g;
+
+INSERT INTO sale (id, sale_number, customer_id, total_amount, total_paid, balance, sale_date, status,
+                  created_at, updated_at)
+SELECT g, 'S' || g, 1, 20, 10, 10, now() - (g * 2 || ' minutes')::interval, 1 + g % 5, now(), now()
+FROM generate_series(1, 50000) g;
+INSERT INTO sale_item (sale_id, product_id, product_name, quantity, unit_price, total_price, status,
+                       created_at, updated_at)
+SELECT 1 + g / 2, 1 + g % 500, 'Product', 1, 10, 10, 1, now(), now() FROM generate_series(0, 99999) g;
+INSERT INTO payment (sale_id, amount, payment_type, payment_account_id, status, created_at, updated_at)
+SELECT g, 10, 'Cash', 1, 1, now(), now() FROM generate_series(1, 50000) g;
+
+INSERT INTO purchase_order (id, supplier_id, invoice_number, purchase_date, status, created_at, updated_at)
+SELECT g, 1, 'P' || g, now() - (g * 5 || ' minutes')::interval, 1 + g % 4, now(), now()
+FROM generate_series(1, 20000) g;
+INSERT INTO purchase_order_item (purchase_order_id, product_id, quantity, unit_price, total_price, status,
+                                 created_at, updated_at)
+SELECT 1 + g / 2, 1 + g % 500, 5, 6, 30, 1, now() - (g || ' minutes')::interval, now()
+FROM generate_series(0, 39999) g;
+
+INSERT INTO expense (description, payment_account_id, total_amount, expense_date, status, created_at, updated_at)
+SELECT 'Expense ' || g, 1, 15, now() - (g * 3 || ' minutes')::interval, CASE WHEN g % 10 = 0 THEN 0 ELSE 1 END,
+       now(), now()
+FROM generate_series(1, 20000) g;
+
+ANALYZE;
+"""
+
+
+@pytest.fixture(scope='module')
+def app():
+    from app import create_app, db
+    from app.utils.chart_of_accounts import seed_chart_of_accounts
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': TEST_DATABASE_URL, 'SQLALCHEMY_BINDS': {}})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_chart_of_accounts()
+        db.session.execute(text(SEED_SQL))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def hot_queries(app):
+    from app.utils.query_plans import hot_queries
+
+    return hot_queries()
+
+
+QUERY_NAMES = [
+    'ledger_page', 'ledger_next_page', 'ledger_month_page', 'ledger_stream',
+    'general_ledger_page', 'general_ledger_stream', 'account_statement',
+    'sales_page', 'sales_month_page', 'sale_items_for_page',
+    'expenses_page', 'purchase_orders_page', 'latest_purchase_prices', 'ledger_totals_for_range',
+]
+
+
+def test_every_hot_query_is_checked(hot_queries):
+    assert sorted(hot_queries) == sorted(QUERY_NAMES)
+
+
+@pytest.mark.parametrize('name', QUERY_NAMES)
+def test_query_plan_uses_indexes(hot_queries, name):
+    from app.utils.query_plans import plan_problems
+
+    assert plan_problems(hot_queries[name]) == []
@@ -0,0 +1,135 @@
+"""
+Read/write routing between the primary and the replica bind (app.utils.replica).
+
+Two SQLite files stand in for the primary and the replica; each holds a
+category named after its database, so a read shows which bind served it.
+The replica's lag is faked, SQLite has no pg_last_xact_replay_timestamp().
+"""
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.models import Category
+from app.utils import replica
+from app.utils.cache import SnapshotCache
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(replica, '_lag_state', {})
+    monkeypatch.setattr(replica, 'replica_lag', lambda engine: 0.0)
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {replica.READ_BIND_KEY: f"sqlite:///{tmp_path / 'replica.db'}"},
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        for key, name in ((None, 'primary'), (replica.READ_BIND_KEY, 'replica')):
+            engine = db.engines[key]
+            Category.__table__.create(engine)
+            with engine.begin() as conn:
+                conn.execute(Category.__table__.insert().values(name=name, status=1))
+        yield app
+        db.session.remove()
+
+
+def served_by():
+    return db.session.query(Category.name).order_by(Category.id).limit(1).scalar()
+
+
+def names_on(key):
+    with db.engines[key].connect() as conn:
+        return set(conn.execute(text("SELECT name FROM category")).scalars())
+
+
+def test_get_reads_from_a_healthy_replica(app):
+    with app.test_request_context('/', method='GET'):
+        replica.use_read_replica()
+        assert served_by() == 'replica'
+
+
+def test_other_methods_read_from_the_primary(app):
+    with app.test_request_context('/', method='POST'):
+        replica.use_read_replica()
+        assert served_by() == 'primary'
+
+
+def test_lagging_replica_falls_back_to_the_primary(app, monkeypatch):
+    monkeypatch.setattr(replica, 'replica_lag', lambda engine: app.config['REPLICA_MAX_LAG'] + 1)
+    with app.test_request_context('/', method='GET'):
+        replica.use_read_replica()
+        assert served_by() == 'primary'
+
+
+def test_unreachable_replica_falls_back_to_the_primary(app, monkeypatch):
+    def unreachable(engine):
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(replica, 'replica_lag', unreachable)
+    with app.test_request_context('/', method='GET'):
+        replica.use_read_replica()
+        assert served_by() == 'primary'
+
+
+def test_without_a_replica_bind_reads_stay_on_the_primary(tmp_path, monkeypatch):
+    monkeypatch.setattr(replica, '_lag_state', {})
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {},
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.test_request_context('/', method='GET'):
+        assert not replica.replica_available()
+        replica.use_read_replica()
+        assert getattr(replica.request, 'read_bind_key', None) is None
+
+
+def test_writes_and_flushes_go_to_the_primary(app):
+    with app.test_request_context('/', method='GET'):
+        replica.use_read_replica()
+        db.session.add(Category(name='added', status=1))
+        db.session.flush()
+        db.session.execute(update(Category).where(Category.name == 'primary').values(description='updated'))
+        db.session.commit()
+
+    assert names_on(None) == {'primary', 'added'}
+    assert names_on(replica.READ_BIND_KEY) == {'replica'}
+    with db.engines[None].connect() as conn:
+        assert conn.execute(text("SELECT description FROM category WHERE name = 'primary'")).scalar() == 'updated'
+
+
+def test_read_replica_view_autoflush_goes_to_the_primary(app):
+    @replica.read_replica
+    def view():
+        db.session.add(Category(name='pending', status=1))
+        # The query autoflushes the pending row; the flush must not reach the replica
+        return db.session.query(Category.name).filter(Category.name == 'pending').scalar()
+
+    with app.test_request_context('/', method='GET'):
+        assert view() is None  # read on the replica, which never saw the row
+        db.session.commit()
+
+    assert 'pending' in names_on(None)
+    assert names_on(replica.READ_BIND_KEY) == {'replica'}
+
+
+def test_reads_from_primary_overrides_the_replica_inside_the_block(app):
+    with app.test_request_context('/', method='GET'):
+        replica.use_read_replica()
+        with replica.reads_from_primary():
+            assert served_by() == 'primary'
+        assert served_by() == 'replica'
+
+
+def test_cache_computes_on_the_primary_right_after_an_invalidation(app):
+    cache = SnapshotCache('TEST_CACHE_TTL', default_ttl=0)
+    with app.test_request_context('/', method='GET'):
+        replica.use_read_replica()
+        assert cache.get_or_compute('name', served_by) == 'replica'
+
+        cache.invalidate()
+        assert cache.get_or_compute('name', served_by) == 'primary'
+
+        app.config.update(REPLICA_MAX_LAG=-1, REPLICA_LAG_CHECK_INTERVAL=0)  # the replica has caught up
+        assert cache.get_or_compute('name', served_by) == 'replica'
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', [
+    '/api/ledgers/account/1/statement',
+    '/api/reports/profit-loss/comparative',
+    '/api/reports/debtors-report',
+    '/api/reports/general-ledger',
+    '/api/reports/trial-balance',
+    '/api/reports/profit-loss',
+    '/api/reports/performance-list',
+    '/api/reports/sales-list',
+    '/api/reports/purchases-list',
+    '/api/reports/cash-flow',
+    '/api/dashboard/metrics',
+])
+def test_report_routes_require_a_token(client, path):
+    assert client.get(path).status_code == 401
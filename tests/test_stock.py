@@ -0,0 +1,26 @@
+import pytest
+
+from app.utils.stock import parse_quantity, sum_quantities
+
+
+@pytest.mark.parametrize('value, expected', [(3, 3), ('4', 4), (' 5 ', 5), (2.0, 2), ('6.00', 6)])
+def test_parse_quantity_accepts_whole_numbers(value, expected):
+    assert parse_quantity(value) == expected
+
+
+@pytest.mark.parametrize('value', ['1.5', 1.5, 'abc', '', None, True, 'nan', 'inf', [1]])
+def test_parse_quantity_rejects_everything_else(value):
+    with pytest.raises(ValueError):
+        parse_quantity(value)
+
+
+def test_sum_quantities_totals_duplicate_lines():
+    items = [{'product_id': 1, 'quantity': 2}, {'product_id': '1', 'quantity': '3'}, {'product_id': 2, 'quantity': 1}]
+    assert sum_quantities(items) == {1: 5, 2: 1}
+
+
+@pytest.mark.parametrize('item', [{'quantity': 1}, {'product_id': 1}, {'product_id': 'x', 'quantity': 1},
+                                  {'product_id': 1, 'quantity': '1.5'}, 'not a line'])
+def test_sum_quantities_rejects_malformed_lines(item):
+    with pytest.raises(ValueError):
+        sum_quantities([item])
@@ -0,0 +1,5 @@
+# Production entry point: `flask --app wsgi serve`, or `gunicorn -c python:app.utils.serving wsgi:app`
+# (bootstrapping runs in the gunicorn when_ready hook, not on import)
+from app import create_app
+
+app = create_app()